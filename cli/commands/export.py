@@ -20,7 +20,7 @@ def query(
         "all",
         "--format",
         "-f",
-        help="Export format: csv, json, excel, or all"
+        help="Export format: csv, json, ndjson, excel, parquet, or all"
     ),
     filename: Optional[str] = typer.Option(
         None,
@@ -123,7 +123,7 @@ def sql(
         "all",
         "--format",
         "-f",
-        help="Export format: csv, json, excel, or all"
+        help="Export format: csv, json, ndjson, excel, parquet, or all"
     ),
     filename: Optional[str] = typer.Option(
         None,
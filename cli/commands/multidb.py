@@ -22,6 +22,9 @@ def add(
     db_port: Optional[int] = typer.Option(None, "--port", "-p"),
     db_user: Optional[str] = typer.Option(None, "--user", "-u"),
     db_password: Optional[str] = typer.Option(None, "--password"),
+    replica_group: Optional[str] = typer.Option(
+        None, "--replica-group", help="Group of connections serving identical data (queried once)"
+    ),
 ):
     """
     Add a database connection to multi-DB manager.
@@ -29,6 +32,7 @@ def add(
     Examples:
         myquery multidb add prod --type postgresql --name proddb --user admin
         myquery multidb add dev --type sqlite --name dev.db
+        myquery multidb add replica1 --type postgresql --name proddb --replica-group prod
     """
     try:
         agent = QueryAgent()
@@ -41,6 +45,7 @@ def add(
             db_port=db_port,
             db_user=db_user,
             db_password=db_password,
+            replica_group=replica_group,
         )
         
         if result.startswith("✅"):
@@ -29,6 +29,11 @@ def chart(
         "--auto/--no-auto",
         help="Auto-connect using .env or saved session",
     ),
+    open_chart: bool = typer.Option(
+        True,
+        "--open/--no-open",
+        help="Open the chart in the browser",
+    ),
 ):
     """
     Execute query and visualize results.
@@ -64,6 +69,7 @@ def chart(
             raise typer.Exit(1)
         
         # Visualize results
+        agent.visualize_data_tool.auto_open = open_chart
         with console.status("[bold cyan]Creating visualization..."):
             viz_result = agent.visualize_data_tool._run(
                 query_result_json=results.get("execution_result"),
@@ -16,7 +16,7 @@ def start(
         None,
         "--host",
         "-h",
-        help="Server host (default: 0.0.0.0)",
+        help="Server host (default: 127.0.0.1; use 0.0.0.0 to listen on all interfaces)",
     ),
     port: Optional[int] = typer.Option(
         None,
@@ -24,6 +24,16 @@ def start(
         "-p",
         help="Server port (default: 8000)",
     ),
+    certfile: Optional[str] = typer.Option(
+        None,
+        "--certfile",
+        help="TLS certificate; with --keyfile, serves HTTP/2 (needs myquery[web])",
+    ),
+    keyfile: Optional[str] = typer.Option(
+        None,
+        "--keyfile",
+        help="TLS private key",
+    ),
 ):
     """
     Start the Web UI server.
@@ -37,17 +47,20 @@ def start(
     Examples:
         myquery web start
         myquery web start --port 3000
+        myquery web start --host 0.0.0.0  # e.g. inside a container
+        myquery web start --certfile cert.pem --keyfile key.pem
     """
     try:
-        server_host = host or "0.0.0.0"
+        server_host = host or "127.0.0.1"
         server_port = port or 8000
+        scheme = "https" if certfile and keyfile else "http"
         
         console.print(Panel(
             f"🌐 Starting Web UI Server\n\n"
             f"Host: {server_host}\n"
             f"Port: {server_port}\n\n"
             f"Open in browser:\n"
-            f"  🔗 http://localhost:{server_port}\n\n"
+            f"  🔗 {scheme}://localhost:{server_port}\n\n"
             f"Features:\n"
             f"  • Interactive query interface\n"
             f"  • Schema explorer\n"
@@ -60,7 +73,7 @@ def start(
         
         # Import and start web server
         from web.main import start_web_server
-        start_web_server(host=server_host, port=server_port)
+        start_web_server(host=server_host, port=server_port, certfile=certfile, keyfile=keyfile)
         
     except KeyboardInterrupt:
         console.print("\n\n[yellow]🛑 Server stopped[/yellow]")
@@ -1,5 +1,5 @@
 """Core package for myquery."""
-from core.agent import QueryAgent
+from core.agent import QueryAgent, ConnectResult
 from core.schema_analyzer import SchemaAnalyzer
 from core.query_generator import QueryGenerator
 from core.data_analyzer import DataAnalyzer
@@ -7,6 +7,7 @@ from core.multi_db_manager import MultiDBManager
 
 __all__ = [
     "QueryAgent",
+    "ConnectResult",
     "SchemaAnalyzer",
     "QueryGenerator",
     "DataAnalyzer",
@@ -1,5 +1,5 @@
 """Main agent orchestration for myquery."""
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, NamedTuple
 from langchain_openai import ChatOpenAI
 from langchain.agents import AgentExecutor, create_openai_tools_agent
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
@@ -25,16 +25,28 @@ from config.settings import settings
 logger = get_logger(__name__)
 
 
+class ConnectResult(NamedTuple):
+    """Outcome of QueryAgent.connect()."""
+    success: bool
+    message: str
+
+
 class QueryAgent:
     """Main agent for orchestrating database query operations."""
     
-    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        headless: bool = False,
+    ):
         """
         Initialize QueryAgent.
         
         Args:
             api_key: OpenAI API key (uses settings if not provided)
             model: OpenAI model name (uses settings if not provided)
+            headless: Don't render result tables to the terminal (server use)
         """
         self.api_key = api_key or (settings.openai_api_key if settings else None)
         self.model = model or (settings.openai_model if settings else "gpt-4-turbo-preview")
@@ -55,7 +67,7 @@ class QueryAgent:
         self.analyze_schema_tool = AnalyzeSchemaTool()
         self.generate_query_tool = GenerateQueryTool()
         self.execute_query_tool = ExecuteQueryTool()
-        self.format_table_tool = FormatTableTool()
+        self.format_table_tool = FormatTableTool(headless=headless)
         self.analyze_data_tool = AnalyzeDataTool()
         self.visualize_data_tool = VisualizeDataTool()
         self.multi_db_query_tool = MultiDBQueryTool()
@@ -130,8 +142,25 @@ class QueryAgent:
             self.get_schema_tool.engine = engine
             self.execute_query_tool.engine = engine
         
+        # A successful (re)connect may point at a different database
+        if self.connect_db_tool.last_connect_succeeded():
+            self.get_schema_tool.invalidate_cache()
+        
         return result
     
+    def connect(self, **connection_args: Any) -> "ConnectResult":
+        """
+        Connect to a database and report the outcome explicitly.
+        
+        Args:
+            **connection_args: Arguments accepted by connect_database
+            
+        Returns:
+            ConnectResult with success flag and status message
+        """
+        message = self.connect_database(**connection_args)
+        return ConnectResult(self.connect_db_tool.last_connect_succeeded(), message)
+    
     def get_schema(self, include_sample_data: bool = False) -> str:
         """
         Get database schema.
@@ -144,6 +173,22 @@ class QueryAgent:
         """
         return self.get_schema_tool._run(include_sample_data=include_sample_data)
     
+    def get_schema_data(self) -> Dict[str, Any]:
+        """
+        Get database schema as a dict, skipping the JSON round trip.
+        
+        Returns:
+            Schema information (shared with the schema tool's cache; do not mutate)
+            
+        Raises:
+            RuntimeError: If the schema could not be extracted
+        """
+        schema_json = self.get_schema()
+        schema_data = self.get_schema_tool.get_cached_schema()
+        if schema_data is None or schema_json.startswith("❌"):
+            raise RuntimeError(schema_json)
+        return schema_data
+    
     def analyze_schema(self) -> str:
         """
         Analyze database schema.
@@ -154,6 +199,38 @@ class QueryAgent:
         schema_json = self.get_schema()
         return self.analyze_schema_tool._run(schema_json=schema_json)
     
+    def generate_sql(self, user_prompt: str, debug: bool = False) -> str:
+        """
+        Generate SQL for a natural language prompt.
+        
+        Args:
+            user_prompt: User's natural language query
+            debug: Enable debug mode
+            
+        Returns:
+            Generated SQL query, or an error message starting with ❌
+        """
+        # Get schema
+        schema_json = self.get_schema()
+        
+        # Build chat history context
+        history_context = self._build_history_context()
+        
+        # Generate SQL query
+        if debug:
+            logger.info(f"🔍 User Query: {user_prompt}")
+        
+        sql_query = self.generate_query_tool._run(
+            user_prompt=user_prompt,
+            schema_json=schema_json,
+            chat_history=history_context,
+        )
+        
+        if debug and not sql_query.startswith("❌"):
+            logger.info(f"🔍 Generated SQL:\n{sql_query}")
+        
+        return sql_query
+    
     def execute_query_flow(
         self, 
         user_prompt: str, 
@@ -186,21 +263,7 @@ class QueryAgent:
         }
         
         try:
-            # Get schema
-            schema_json = self.get_schema()
-            
-            # Build chat history context
-            history_context = self._build_history_context()
-            
-            # Generate SQL query
-            if debug:
-                logger.info(f"🔍 User Query: {user_prompt}")
-            
-            sql_query = self.generate_query_tool._run(
-                user_prompt=user_prompt,
-                schema_json=schema_json,
-                chat_history=history_context,
-            )
+            sql_query = self.generate_sql(user_prompt, debug=debug)
             
             if sql_query.startswith("❌"):
                 results["error"] = sql_query
@@ -208,9 +271,6 @@ class QueryAgent:
             
             results["sql_query"] = sql_query
             
-            if debug:
-                logger.info(f"🔍 Generated SQL:\n{sql_query}")
-            
             # Execute query
             execution_result = self.execute_query_tool._run(sql_query=sql_query)
             results["execution_result"] = execution_result
@@ -259,14 +319,7 @@ class QueryAgent:
                     logger.warning(f"Optimization failed: {str(e)}")
             
             # Add to chat history
-            self.chat_history.append({
-                "role": "user",
-                "content": user_prompt,
-            })
-            self.chat_history.append({
-                "role": "assistant",
-                "content": f"SQL: {sql_query}\nAnalysis: {analysis}",
-            })
+            self.record_query_exchange(user_prompt, sql_query, analysis)
             
             return results
             
@@ -403,6 +456,28 @@ class QueryAgent:
         """Check if connected to database."""
         return self.connect_db_tool.is_connected()
     
+    def record_query_exchange(self, user_prompt: str, sql_query: str, analysis: Optional[str]) -> None:
+        """
+        Add an answered query to the chat history used for follow-up prompts.
+        
+        Args:
+            user_prompt: User's natural language query
+            sql_query: SQL generated for it
+            analysis: Analysis of the result, if one was made
+        """
+        content = f"SQL: {sql_query}"
+        if analysis is not None:
+            content += f"\nAnalysis: {analysis}"
+        
+        self.chat_history.append({
+            "role": "user",
+            "content": user_prompt,
+        })
+        self.chat_history.append({
+            "role": "assistant",
+            "content": content,
+        })
+    
     def clear_history(self) -> None:
         """Clear chat history."""
         self.chat_history = []
@@ -420,7 +495,7 @@ class QueryAgent:
         
         Args:
             query_result_json: Query results as JSON string
-            format: Export format (csv, json, excel, all)
+            format: Export format (csv, json, ndjson, excel, parquet, all)
             filename: Output filename
             output_dir: Output directory
             
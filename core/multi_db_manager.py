@@ -1,5 +1,5 @@
 """Multi-database connection manager for myquery."""
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, Any, Tuple
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
 from config.logging import get_logger
@@ -15,6 +15,8 @@ class MultiDBManager:
         """Initialize multi-database manager."""
         self.connections: Dict[str, Engine] = {}
         self.metadata: Dict[str, Dict[str, Any]] = {}
+        # Cached connection names, rebuilt after add/remove
+        self._connection_names: Optional[Tuple[str, ...]] = None
     
     def add_connection(
         self,
@@ -25,6 +27,7 @@ class MultiDBManager:
         db_port: Optional[int] = None,
         db_user: Optional[str] = None,
         db_password: Optional[str] = None,
+        replica_group: Optional[str] = None,
     ) -> str:
         """
         Add a new database connection.
@@ -37,6 +40,8 @@ class MultiDBManager:
             db_port: Database port
             db_user: Database username
             db_password: Database password
+            replica_group: Group shared by connections serving identical data
+                (e.g. read replicas); queries run once per group
             
         Returns:
             Status message
@@ -54,21 +59,33 @@ class MultiDBManager:
             else:
                 return f"❌ Unsupported database type: {db_type}"
             
+            # Pool tuning only applies to server databases; SQLite keeps its default pool.
+            # LIFO checkout keeps reusing the most recently used (warm) connections
+            engine_kwargs = {"pool_pre_ping": True}
+            if db_type.lower() != "sqlite":
+                engine_kwargs.update(
+                    pool_size=8,
+                    max_overflow=16,
+                    pool_recycle=3600,
+                    pool_use_lifo=True,
+                )
+            
             # Create engine
-            engine = create_engine(db_url, pool_pre_ping=True)
+            engine = create_engine(db_url, **engine_kwargs)
             
-            # Test connection
-            from sqlalchemy import text
-            with engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
+            # Test connection (checkout alone opens or pre-pings a DBAPI connection)
+            with engine.connect():
+                pass
             
             # Store connection
             self.connections[name] = engine
+            self._connection_names = None
             self.metadata[name] = {
                 "type": db_type,
                 "name": db_name,
                 "host": db_host,
                 "port": db_port,
+                "replica_group": replica_group,
             }
             
             logger.info(f"✅ Added connection '{name}'")
@@ -87,6 +104,7 @@ class MultiDBManager:
             self.connections[name].dispose()
             del self.connections[name]
             del self.metadata[name]
+            self._connection_names = None
             
             logger.info(f"✅ Removed connection '{name}'")
             return f"✅ Connection '{name}' removed"
@@ -99,9 +117,15 @@ class MultiDBManager:
         """Get a database connection by name."""
         return self.connections.get(name)
     
-    def list_connections(self) -> List[str]:
+    def list_connections(self) -> Tuple[str, ...]:
         """List all connection names."""
-        return list(self.connections.keys())
+        if self._connection_names is None:
+            self._connection_names = tuple(self.connections)
+        return self._connection_names
+    
+    def get_replica_group(self, name: str) -> Optional[str]:
+        """Get the replica group of a connection, if any."""
+        return self.metadata.get(name, {}).get("replica_group")
     
     def get_connection_info(self, name: str) -> Optional[Dict[str, Any]]:
         """Get connection metadata."""
@@ -81,7 +81,7 @@ class MCPServer:
                         "id": session_id,
                         "context": MCPContext(session_id=session_id),
                     }
-                    self.agents[session_id] = QueryAgent()
+                    self.agents[session_id] = QueryAgent(headless=True)
                 
                 agent = self.agents[session_id]
                 context = self.sessions[session_id]["context"]
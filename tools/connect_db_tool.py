@@ -1,10 +1,11 @@
 """Database connection tool for myquery."""
-from typing import Optional, Type, Dict, Any
+from typing import Optional, Type, Dict, Any, Tuple
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
 from config.logging import get_logger
+import time
 
 logger = get_logger(__name__)
 
@@ -17,6 +18,9 @@ class ConnectDBInput(BaseModel):
     db_port: Optional[int] = Field(default=None, description="Database port")
     db_user: Optional[str] = Field(default=None, description="Database username")
     db_password: Optional[str] = Field(default=None, description="Database password")
+    pool_size: Optional[int] = Field(default=10, description="Connections kept open in the pool")
+    max_overflow: Optional[int] = Field(default=20, description="Extra connections allowed beyond pool_size")
+    pool_recycle: Optional[int] = Field(default=1800, description="Seconds before a pooled connection is recycled")
 
 
 class ConnectDBTool(BaseTool):
@@ -30,8 +34,15 @@ class ConnectDBTool(BaseTool):
     """
     args_schema: Type[BaseModel] = ConnectDBInput
     
+    # Seconds an is_connected() result is reused before pinging again
+    connection_check_ttl: float = 5.0
+    
     # Store the engine instance
     _engine: Optional[Engine] = None
+    # (monotonic timestamp, result) of the last is_connected() check
+    _last_check: Optional[Tuple[float, bool]] = None
+    # Whether the most recent _run() call connected
+    _last_connect_ok: bool = False
     
     def _run(
         self,
@@ -41,6 +52,9 @@ class ConnectDBTool(BaseTool):
         db_port: Optional[int] = None,
         db_user: Optional[str] = None,
         db_password: Optional[str] = None,
+        pool_size: Optional[int] = 10,
+        max_overflow: Optional[int] = 20,
+        pool_recycle: Optional[int] = 1800,
     ) -> str:
         """
         Connect to database.
@@ -52,10 +66,18 @@ class ConnectDBTool(BaseTool):
             db_port: Database port
             db_user: Database username
             db_password: Database password
+            pool_size: Connections kept open in the pool (server databases only)
+            max_overflow: Extra connections allowed beyond pool_size
+            pool_recycle: Seconds before a pooled connection is recycled
             
         Returns:
             Connection status message
         """
+        # A new connection attempt invalidates the memoized status
+        self._last_check = None
+        self._last_connect_ok = False
+        engine = None
+        
         try:
             # Build connection URL
             if db_type.lower() == "sqlite":
@@ -69,25 +91,50 @@ class ConnectDBTool(BaseTool):
             else:
                 return f"❌ Unsupported database type: {db_type}"
             
+            # Pool tuning only applies to server databases; SQLite keeps its default pool
+            engine_kwargs = {"pool_pre_ping": True}
+            if db_type.lower() != "sqlite":
+                engine_kwargs.update(
+                    pool_size=pool_size if pool_size is not None else 10,
+                    max_overflow=max_overflow if max_overflow is not None else 20,
+                    pool_recycle=pool_recycle if pool_recycle is not None else 1800,
+                    pool_timeout=30,
+                    connect_args={"connect_timeout": 10},
+                )
+            
             # Create engine
             logger.info(f"Connecting to {db_type} database: {db_name}")
-            self._engine = create_engine(db_url, pool_pre_ping=True)
+            engine = create_engine(db_url, **engine_kwargs)
             
-            # Test connection
-            with self._engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
+            # Test connection (checkout alone opens or pre-pings a DBAPI connection)
+            with engine.connect():
+                pass
             
+            # Only a working engine replaces the current one; release the old pool
+            if self._engine is not None:
+                self._engine.dispose()
+            self._engine = engine
+            
+            self._last_connect_ok = True
             logger.info("✅ Database connection successful")
+            logger.info(f"Connection pool: {self._engine.pool.status()}")
             return f"✅ Successfully connected to {db_type} database: {db_name}"
             
         except Exception as e:
             logger.error(f"Database connection failed: {str(e)}")
+            # Keep the previous engine; drop the pool of the one that failed
+            if engine is not None:
+                engine.dispose()
             return f"❌ Failed to connect to database: {str(e)}"
     
     async def _arun(self, *args, **kwargs) -> str:
         """Async version (not implemented)."""
         return self._run(*args, **kwargs)
     
+    def last_connect_succeeded(self) -> bool:
+        """Check whether the most recent connection attempt succeeded."""
+        return self._last_connect_ok
+    
     def get_engine(self) -> Optional[Engine]:
         """Get the SQLAlchemy engine instance."""
         return self._engine
@@ -96,10 +143,19 @@ class ConnectDBTool(BaseTool):
         """Check if database is connected."""
         if self._engine is None:
             return False
+        
+        now = time.monotonic()
+        if self._last_check and now - self._last_check[0] < self.connection_check_ttl:
+            return self._last_check[1]
+        
         try:
-            with self._engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
-            return True
+            # pool_pre_ping validates the connection on checkout
+            with self._engine.connect():
+                pass
+            connected = True
         except:
-            return False
+            connected = False
+        
+        self._last_check = (now, connected)
+        return connected
 
@@ -1,14 +1,41 @@
 """SQL query execution tool for myquery."""
-from typing import Optional, Type, List, Dict, Any
+from typing import Optional, Type, List, Dict, Any, Tuple, Iterator
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
 from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.engine import Engine
 from config.logging import get_logger
 import json
+import io
+import base64
+import re
+import orjson
 
 logger = get_logger(__name__)
 
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+# Leading whitespace and SQL comments before the first keyword
+_LEADING_COMMENTS = r"^\s*(?:(?:--[^\n]*(?:\n|$)|/\*.*?\*/)\s*)*"
+
+# Leading destructive keyword
+_DESTRUCTIVE_RE = re.compile(
+    _LEADING_COMMENTS + r"(?:DROP|DELETE|TRUNCATE|UPDATE|ALTER|CREATE)\b",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Read queries that can be bounded with an outer LIMIT
+_SELECT_RE = re.compile(_LEADING_COMMENTS + r"(?:SELECT|WITH)\b", re.IGNORECASE | re.DOTALL)
+_LIMIT_RE = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+_TRAILING_TERMINATOR_RE = re.compile(r"[\s;]+$")
+
+# Trailing single-column ORDER BY, usable as a keyset pagination cursor
+_ORDER_BY_RE = re.compile(
+    r"\bORDER\s+BY\s+(?:\w+\.)?(\w+)(?:\s+(ASC|DESC))?[\s;]*$",
+    re.IGNORECASE,
+)
+
 
 class ExecuteQueryInput(BaseModel):
     """Input schema for ExecuteQueryTool."""
@@ -17,6 +44,13 @@ class ExecuteQueryInput(BaseModel):
         default=100, 
         description="Maximum number of rows to return"
     )
+    page_token: Optional[str] = Field(
+        default=None,
+        description=(
+            "next_page_token from a previous result to fetch the following page. "
+            "The query must end with ORDER BY on a single unique column."
+        )
+    )
 
 
 class ExecuteQueryTool(BaseTool):
@@ -31,14 +65,16 @@ class ExecuteQueryTool(BaseTool):
     args_schema: Type[BaseModel] = ExecuteQueryInput
     
     engine: Optional[Engine] = None
+    yield_per: int = 1000
     
-    def _run(self, sql_query: str, max_rows: int = 100) -> str:
+    def _run(self, sql_query: str, max_rows: int = 100, page_token: Optional[str] = None) -> str:
         """
         Execute SQL query.
         
         Args:
             sql_query: SQL query to execute
             max_rows: Maximum rows to return
+            page_token: Cursor returned as next_page_token by a previous call
             
         Returns:
             JSON string with query results
@@ -54,28 +90,46 @@ class ExecuteQueryTool(BaseTool):
             logger.info(f"Executing query: {sql_query[:100]}...")
             
             with self.engine.connect() as conn:
-                result = conn.execute(text(sql_query))
+                # Server-side cursor: rows arrive in batches of yield_per
+                # instead of being buffered by the driver all at once
+                conn = conn.execution_options(
+                    stream_results=True,
+                    yield_per=max(1, min(max_rows + 1, self.yield_per)),
+                )
+                order = _ORDER_BY_RE.search(sql_query)
                 
-                # Fetch results
-                rows = result.fetchmany(max_rows)
+                if page_token:
+                    if order is None:
+                        raise ValueError(
+                            "page_token requires a query ending with ORDER BY on a single column"
+                        )
+                    result = self._execute_page(conn, sql_query, order, page_token, max_rows)
+                else:
+                    result = self._execute(conn, sql_query, max_rows)
                 
-                # Convert to list of dicts
                 columns = list(result.keys())
-                data = [dict(zip(columns, row)) for row in rows]
                 
-                # Get row count
-                row_count = len(data)
+                # Serialize rows straight into the output buffer
+                buffer = io.StringIO()
+                row_count, truncated, last_row = self._write_rows(buffer, result, max_rows)
+                result.close()
+                
+                # Keyset cursor: the ORDER BY value of the last row returned
+                next_page_token = None
+                if truncated and order is not None and order.group(1) in columns:
+                    next_page_token = self._encode_page_token(last_row[order.group(1)])
                 
-                result_info = {
-                    "success": True,
-                    "row_count": row_count,
-                    "columns": columns,
-                    "data": data,
-                    "truncated": row_count >= max_rows,
-                }
+                result_json = (
+                    '{"success": true, '
+                    f'"row_count": {row_count}, '
+                    f'"columns": {orjson.dumps(columns, default=str).decode()}, '
+                    f'"data": [{buffer.getvalue()}], '
+                    f'"truncated": {json.dumps(truncated)}, '
+                    f'"next_page_token": {json.dumps(next_page_token)}}}'
+                )
                 
                 logger.info(f"✅ Query executed successfully: {row_count} rows returned")
-                return json.dumps(result_info, indent=2, default=str)
+                return result_json
                 
         except Exception as e:
             logger.error(f"Query execution failed: {str(e)}")
@@ -90,14 +144,166 @@ class ExecuteQueryTool(BaseTool):
         """Async version (not implemented)."""
         return self._run(*args, **kwargs)
     
-    def _is_destructive_query(self, query: str) -> bool:
-        """Check if query contains destructive operations."""
-        query_upper = query.upper().strip()
-        destructive_keywords = ["DROP", "DELETE", "TRUNCATE", "UPDATE", "ALTER", "CREATE"]
+    def stream_ndjson(
+        self,
+        sql_query: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        max_rows: Optional[int] = None,
+    ) -> Iterator[bytes]:
+        """
+        Execute a query and stream its full result as NDJSON.
+        
+        Rows are JSON arrays in column order; every other line is an object
+        tagged with "type", so a column named like a control field cannot be
+        mistaken for one:
+        
+            {"type": "header", "columns": [...], **metadata}
+            [value, value, ...]                    (one per row)
+            {"type": "end", "row_count": n, "truncated": bool}
+        
+        A failure is reported as {"type": "error", "error": ...}, possibly in
+        place of the header. Each chunk covers one yield_per batch, so memory
+        stays bounded however large the result is.
+        
+        Args:
+            sql_query: SQL query to execute
+            metadata: Extra fields for the first line
+            max_rows: Stop after this many rows (None streams the whole result)
+            
+        Returns:
+            Iterator of NDJSON byte chunks
+            
+        Raises:
+            ValueError: If not connected or the query is destructive
+        """
+        if self.engine is None:
+            raise ValueError("No database connection. Please connect to a database first.")
+        
+        if self._is_destructive_query(sql_query):
+            raise ValueError("Destructive queries (DROP, DELETE, TRUNCATE, UPDATE) are not allowed without explicit confirmation.")
+        
+        return self._ndjson_chunks(sql_query, metadata or {}, max_rows)
+    
+    def _ndjson_chunks(self, sql_query: str, metadata: Dict[str, Any], max_rows: Optional[int]) -> Iterator[bytes]:
+        """Generator behind stream_ndjson; holds the connection until exhausted."""
+        logger.info(f"Streaming query: {sql_query[:100]}...")
+        row_count = 0
+        truncated = False
+        
+        try:
+            with self.engine.connect() as conn:
+                if max_rows is None:
+                    conn = conn.execution_options(stream_results=True, yield_per=self.yield_per)
+                    result = conn.execute(text(sql_query))
+                else:
+                    conn = conn.execution_options(
+                        stream_results=True,
+                        yield_per=max(1, min(max_rows + 1, self.yield_per)),
+                    )
+                    result = self._execute(conn, sql_query, max_rows)
+                
+                header = {"type": "header", **metadata, "columns": list(result.keys())}
+                yield orjson.dumps(header, default=str) + b"\n"
+                
+                for partition in result.partitions():
+                    if max_rows is not None and row_count + len(partition) > max_rows:
+                        partition = partition[:max_rows - row_count]
+                        truncated = True
+                    
+                    if partition:
+                        yield b"".join(
+                            orjson.dumps(tuple(row), default=str, option=_ORJSON_OPTIONS) + b"\n"
+                            for row in partition
+                        )
+                        row_count += len(partition)
+                    
+                    if truncated:
+                        result.close()
+                        break
+        except Exception as e:
+            logger.error(f"Query streaming failed: {str(e)}")
+            yield orjson.dumps({"type": "error", "error": str(e)}) + b"\n"
+            return
+        
+        logger.info(f"✅ Query streamed successfully: {row_count} rows")
+        yield orjson.dumps({"type": "end", "row_count": row_count, "truncated": truncated}) + b"\n"
+    
+    def _execute(self, conn, sql_query: str, max_rows: int):
+        """Execute a query, letting the database apply the row limit when possible."""
+        bounded_query = self._bound_query(sql_query, max_rows)
+        if bounded_query is not None:
+            try:
+                return conn.execute(text(bounded_query))
+            except DBAPIError:
+                # Some statements cannot be wrapped (e.g. MySQL rejects duplicate
+                # column names in derived tables); fall back to the original query
+                conn.rollback()
+        
+        return conn.execute(text(sql_query))
+    
+    def _execute_page(self, conn, sql_query: str, order: re.Match, page_token: str, max_rows: int):
+        """Fetch the page after page_token by seeking past it on the ORDER BY column."""
+        column = conn.dialect.identifier_preparer.quote(order.group(1))
+        descending = (order.group(2) or "").upper() == "DESC"
+        inner_query = _TRAILING_TERMINATOR_RE.sub("", sql_query)
+        
+        page_query = (
+            f"SELECT * FROM (\n{inner_query}\n) AS _mq "
+            f"WHERE {column} {'<' if descending else '>'} :_mq_last "
+            f"ORDER BY {column} {'DESC' if descending else 'ASC'} "
+            f"LIMIT {max_rows + 1}"
+        )
+        return conn.execute(text(page_query), {"_mq_last": self._decode_page_token(page_token)})
+    
+    def _encode_page_token(self, value: Any) -> str:
+        """Encode a keyset cursor value as an opaque token."""
+        return base64.urlsafe_b64encode(orjson.dumps({"last": value}, default=str)).decode()
+    
+    def _decode_page_token(self, page_token: str) -> Any:
+        """Decode a token produced by _encode_page_token."""
+        try:
+            return orjson.loads(base64.urlsafe_b64decode(page_token.encode()))["last"]
+        except (ValueError, KeyError, TypeError):
+            raise ValueError("Invalid page_token")
+    
+    def _bound_query(self, sql_query: str, max_rows: int) -> Optional[str]:
+        """
+        Wrap an unbounded SELECT in an outer LIMIT.
         
-        for keyword in destructive_keywords:
-            if query_upper.startswith(keyword):
-                return True
+        One extra row is requested so truncation can be detected exactly.
+        Returns None when the query is not a SELECT or already has a LIMIT.
+        """
+        if not _SELECT_RE.match(sql_query) or _LIMIT_RE.search(sql_query):
+            return None
         
-        return False
+        inner_query = _TRAILING_TERMINATOR_RE.sub("", sql_query)
+        return f"SELECT * FROM (\n{inner_query}\n) AS _mq LIMIT {max_rows + 1}"
+    
+    def _write_rows(self, buffer: io.StringIO, result, max_rows: int) -> Tuple[int, bool, Any]:
+        """
+        Stream up to max_rows rows from a result into buffer as JSON objects.
+        
+        Returns:
+            Rows written, whether more rows were available, and the last row written
+        """
+        row_count = 0
+        last_row = None
+        
+        for partition in result.partitions():
+            for row in partition:
+                if row_count >= max_rows:
+                    return row_count, True, last_row
+                if row_count:
+                    buffer.write(", ")
+                last_row = row._mapping
+                buffer.write(
+                    orjson.dumps(dict(last_row), default=str, option=_ORJSON_OPTIONS).decode()
+                )
+                row_count += 1
+        
+        return row_count, False, last_row
+    
+    def _is_destructive_query(self, query: str) -> bool:
+        """Check if query contains destructive operations."""
+        return _DESTRUCTIVE_RE.match(query) is not None
 
@@ -4,20 +4,30 @@ from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
 from config.logging import get_logger
 import json
-import csv
+import orjson
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import numpy as np
 import pandas as pd
+import xlsxwriter
 
 logger = get_logger(__name__)
 
+# Supported export formats; "all" expands to _ALL_FORMATS
+_EXPORT_FORMATS = ("csv", "json", "ndjson", "excel", "parquet")
+_ALL_FORMATS = ("csv", "json", "excel")
+_FORMAT_ALIASES = {"xlsx": "excel"}
+# Formats written from the shared DataFrame
+_TABULAR_FORMATS = {"csv", "excel", "parquet"}
+
 
 class ExportDataInput(BaseModel):
     """Input schema for ExportDataTool."""
     query_result_json: str = Field(description="JSON string containing query results")
     format: str = Field(
         default="csv",
-        description="Export format: csv, json, excel, or all"
+        description="Export format: csv, json, ndjson, excel, parquet, or all (csv, json and excel)"
     )
     filename: Optional[str] = Field(
         default=None,
@@ -34,8 +44,8 @@ class ExportDataTool(BaseTool):
     
     name: str = "export_data"
     description: str = """
-    Export query results to CSV, JSON, or Excel format.
-    Supports single format or exporting to all formats at once.
+    Export query results to CSV, JSON, NDJSON, Excel, or Parquet format.
+    Supports a single format, or "all" to export CSV, JSON and Excel at once.
     Files are saved to outputs/exports/ directory by default.
     Use this tool when users want to save or export query results.
     """
@@ -53,7 +63,8 @@ class ExportDataTool(BaseTool):
         
         Args:
             query_result_json: JSON string with query results
-            format: Export format (csv, json, excel, all)
+            format: Export format (csv, json, ndjson, excel, parquet, or all
+                for csv, json and excel)
             filename: Output filename without extension
             output_dir: Output directory
             
@@ -76,6 +87,16 @@ class ExportDataTool(BaseTool):
             if not data:
                 return "ℹ️  No data to export"
             
+            # Resolve the requested format(s) once
+            fmt = format.lower()
+            fmt = _FORMAT_ALIASES.get(fmt, fmt)
+            if fmt == "all":
+                targets = _ALL_FORMATS
+            elif fmt in _EXPORT_FORMATS:
+                targets = (fmt,)
+            else:
+                return f"❌ Invalid format: {format}. Use csv, json, ndjson, excel, parquet, or all"
+            
             # Create output directory
             output_path = Path(output_dir)
             output_path.mkdir(parents=True, exist_ok=True)
@@ -85,23 +106,27 @@ class ExportDataTool(BaseTool):
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"query_export_{timestamp}"
             
-            # Export based on format
-            exported_files = []
-            
-            if format.lower() in ["csv", "all"]:
-                csv_file = self._export_csv(data, columns, output_path, filename)
-                exported_files.append(csv_file)
-            
-            if format.lower() in ["json", "all"]:
-                json_file = self._export_json(data, columns, output_path, filename)
-                exported_files.append(json_file)
+            # Build the DataFrame once and share it between tabular writers
+            df = None
+            if not _TABULAR_FORMATS.isdisjoint(targets):
+                df = pd.DataFrame(data, columns=columns)
             
-            if format.lower() in ["excel", "xlsx", "all"]:
-                excel_file = self._export_excel(data, columns, output_path, filename)
-                exported_files.append(excel_file)
+            handlers = {
+                "csv": (self._export_csv, (df, output_path, filename)),
+                "json": (self._export_json, (data, columns, output_path, filename)),
+                "ndjson": (self._export_ndjson, (data, columns, output_path, filename)),
+                "excel": (self._export_excel, (df, output_path, filename)),
+                "parquet": (self._export_parquet, (df, output_path, filename)),
+            }
+            jobs = [handlers[target] for target in targets]
             
-            if not exported_files:
-                return f"❌ Invalid format: {format}. Use csv, json, excel, or all"
+            # Independent writers overlap their disk I/O when exporting several formats
+            if len(jobs) > 1:
+                with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+                    futures = [executor.submit(writer, *args) for writer, args in jobs]
+                    exported_files = [future.result() for future in futures]
+            else:
+                exported_files = [writer(*args) for writer, args in jobs]
             
             # Build success message
             row_count = len(data)
@@ -132,21 +157,14 @@ class ExportDataTool(BaseTool):
     
     def _export_csv(
         self,
-        data: List[dict],
-        columns: List[str],
+        df: pd.DataFrame,
         output_path: Path,
         filename: str
     ) -> str:
         """Export data to CSV format."""
         csv_path = output_path / f"{filename}.csv"
         
-        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-            if not data:
-                return str(csv_path)
-            
-            writer = csv.DictWriter(f, fieldnames=columns)
-            writer.writeheader()
-            writer.writerows(data)
+        df.to_csv(csv_path, index=False, chunksize=50_000, encoding='utf-8')
         
         logger.info(f"CSV exported: {csv_path}")
         return str(csv_path)
@@ -170,44 +188,84 @@ class ExportDataTool(BaseTool):
             "data": data
         }
         
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, default=str)
+        with open(json_path, 'wb') as f:
+            f.write(orjson.dumps(export_data, default=str, option=orjson.OPT_INDENT_2))
         
         logger.info(f"JSON exported: {json_path}")
         return str(json_path)
     
-    def _export_excel(
+    def _export_ndjson(
         self,
         data: List[dict],
         columns: List[str],
         output_path: Path,
         filename: str
+    ) -> str:
+        """Export data as line-delimited JSON: a metadata line, then one row per line."""
+        ndjson_path = output_path / f"{filename}.ndjson"
+        
+        metadata = {
+            "exported_at": datetime.now().isoformat(),
+            "row_count": len(data),
+            "columns": columns,
+        }
+        
+        with open(ndjson_path, 'wb') as f:
+            f.write(orjson.dumps({"metadata": metadata}) + b"\n")
+            for row in data:
+                f.write(orjson.dumps(row, default=str) + b"\n")
+        
+        logger.info(f"NDJSON exported: {ndjson_path}")
+        return str(ndjson_path)
+    
+    def _export_excel(
+        self,
+        df: pd.DataFrame,
+        output_path: Path,
+        filename: str
     ) -> str:
         """Export data to Excel format."""
         excel_path = output_path / f"{filename}.xlsx"
         
-        # Create DataFrame
-        df = pd.DataFrame(data, columns=columns)
+        # Column widths must be known up front: constant-memory mode flushes
+        # each row to disk as soon as the next one starts
+        cell_widths = df.map(lambda value: len(str(value))).max().to_numpy()
+        header_widths = np.array([len(str(col)) for col in df.columns])
+        widths = np.minimum(np.maximum(cell_widths, header_widths) + 2, 50)
         
-        # Export to Excel with formatting
-        with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Query Results', index=False)
+        # Stream rows with xlsxwriter instead of building the workbook in memory
+        workbook = xlsxwriter.Workbook(str(excel_path), {'constant_memory': True})
+        try:
+            worksheet = workbook.add_worksheet('Query Results')
+            header_format = workbook.add_format({'bold': True, 'border': 1})
+            
+            for idx, width in enumerate(widths):
+                worksheet.set_column(idx, idx, int(width))
             
-            # Get workbook and worksheet
-            workbook = writer.book
-            worksheet = writer.sheets['Query Results']
+            worksheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
             
-            # Auto-adjust column widths
-            for idx, col in enumerate(df.columns):
-                max_length = max(
-                    df[col].astype(str).apply(len).max(),
-                    len(str(col))
-                )
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[chr(65 + idx)].width = adjusted_width
+            values = df.astype(object).where(df.notna(), None)
+            for row_idx, row in enumerate(values.itertuples(index=False, name=None), start=1):
+                worksheet.write_row(row_idx, 0, row)
+        finally:
+            workbook.close()
         
         logger.info(f"Excel exported: {excel_path}")
         return str(excel_path)
+    
+    def _export_parquet(
+        self,
+        df: pd.DataFrame,
+        output_path: Path,
+        filename: str
+    ) -> str:
+        """Export data to Parquet format (columnar, zstd-compressed)."""
+        parquet_path = output_path / f"{filename}.parquet"
+        
+        df.to_parquet(parquet_path, engine='pyarrow', compression='zstd', index=False)
+        
+        logger.info(f"Parquet exported: {parquet_path}")
+        return str(parquet_path)
 
 
 class QuickExportMixin:
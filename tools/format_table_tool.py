@@ -6,10 +6,13 @@ from rich.console import Console
 from rich.table import Table
 from rich import box
 from config.logging import get_logger
-import json
+import orjson
 
 logger = get_logger(__name__)
 
+# Shared console; building one per call re-detects the terminal every time
+_console = Console()
+
 
 class FormatTableInput(BaseModel):
     """Input schema for FormatTableTool."""
@@ -28,6 +31,9 @@ class FormatTableTool(BaseTool):
     """
     args_schema: Type[BaseModel] = FormatTableInput
     
+    # Skip Rich rendering when nobody is watching the terminal (web/MCP servers)
+    headless: bool = False
+    
     def _run(self, query_result_json: str, title: Optional[str] = "Query Results") -> str:
         """
         Format query results as a table.
@@ -42,7 +48,7 @@ class FormatTableTool(BaseTool):
         try:
             logger.info("Formatting query results...")
             
-            result_data = json.loads(query_result_json)
+            result_data = orjson.loads(query_result_json)
             
             # Check if query was successful
             if not result_data.get("success", False):
@@ -57,8 +63,10 @@ class FormatTableTool(BaseTool):
             if not data:
                 return "ℹ️  Query executed successfully but returned no results."
             
+            if self.headless:
+                return f"Table with {row_count} rows × {len(columns)} columns"
+            
             # Create Rich table
-            console = Console()
             table = Table(
                 title=title,
                 box=box.ROUNDED,
@@ -71,25 +79,29 @@ class FormatTableTool(BaseTool):
             for col in columns:
                 table.add_column(str(col), style="white", no_wrap=False)
             
-            # Add rows
+            # Add rows; rows produced by execute_query already follow column order,
+            # so their values can be used directly without per-cell lookups
+            column_count = len(columns)
             for row in data:
-                row_values = [str(row.get(col, "")) for col in columns]
-                table.add_row(*row_values)
+                if len(row) == column_count:
+                    table.add_row(*map(str, row.values()))
+                else:
+                    table.add_row(*[str(row.get(col, "")) for col in columns])
             
             # Print table
-            console.print(table)
+            _console.print(table)
             
             # Print summary
             summary = f"\n📊 Results: {row_count} row(s)"
             if truncated:
                 summary += " (truncated, use LIMIT to see more)"
             
-            console.print(summary, style="dim")
+            _console.print(summary, style="dim")
             
             logger.info(f"✅ Table formatted: {row_count} rows")
             return f"Table displayed with {row_count} rows"
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Invalid result JSON: {str(e)}")
             return f"❌ Invalid result JSON: {str(e)}"
         except Exception as e:
@@ -1,14 +1,54 @@
 """SQL query generation tool for myquery."""
-from typing import Optional, Type
+from typing import Optional, Type, List
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
 from langchain_openai import ChatOpenAI
 from config.logging import get_logger
 import json
 import re
+from functools import lru_cache
 
 logger = get_logger(__name__)
 
+# Markdown code fences, with or without a sql language tag
+_MD_FENCE_RE = re.compile(r'```(?:sql)?\s*', re.IGNORECASE)
+
+
+def _build_schema_summary(schema_data: dict) -> str:
+    """Build a concise schema summary for the prompt."""
+    parts = []
+    
+    for table_name, table_info in schema_data.get("tables", {}).items():
+        columns = table_info.get("columns", [])
+        col_names = [f"{col['name']} ({col['type']})" for col in columns]
+        
+        pk = table_info.get("primary_keys", [])
+        fk = table_info.get("foreign_keys", [])
+        
+        parts.append(f"Table: {table_name}")
+        parts.append(f"  Columns: {', '.join(col_names)}")
+        
+        if pk:
+            parts.append(f"  Primary Key: {', '.join(pk)}")
+        
+        if fk:
+            fk_info = [
+                f"{fk_item['columns']} -> {fk_item['refers_to_table']}.{fk_item['refers_to_columns']}"
+                for fk_item in fk
+            ]
+            parts.append(f"  Foreign Keys: {'; '.join(fk_info)}")
+        
+        # Blank line between tables
+        parts.append("")
+    
+    return "\n".join(parts)
+
+
+@lru_cache(maxsize=32)
+def _summarize_schema(schema_json: str) -> str:
+    """Parse schema JSON and summarize it; repeated calls with the same schema hit the cache."""
+    return _build_schema_summary(json.loads(schema_json))
+
 
 class GenerateQueryInput(BaseModel):
     """Input schema for GenerateQueryTool."""
@@ -58,13 +98,77 @@ class GenerateQueryTool(BaseTool):
         try:
             logger.info(f"Generating SQL query for: {user_prompt}")
             
-            schema_data = json.loads(schema_json)
+            prompt = self._build_prompt(user_prompt, schema_json, chat_history)
+            response = self.llm.invoke(prompt)
+            return self._parse_response(response)
+            
+        except Exception as e:
+            return self._format_error(e)
+    
+    async def _arun(
+        self, 
+        user_prompt: str, 
+        schema_json: str, 
+        chat_history: Optional[str] = ""
+    ) -> str:
+        """Async version: awaits the LLM instead of blocking the event loop."""
+        if self.llm is None:
+            return "❌ LLM not configured. Please set up OpenAI API key."
+        
+        try:
+            logger.info(f"Generating SQL query for: {user_prompt}")
+            
+            prompt = self._build_prompt(user_prompt, schema_json, chat_history)
+            response = await self.llm.ainvoke(prompt)
+            return self._parse_response(response)
+            
+        except Exception as e:
+            return self._format_error(e)
+    
+    async def generate_many(
+        self,
+        user_prompts: List[str],
+        schema_json: str,
+        chat_history: Optional[str] = ""
+    ) -> List[str]:
+        """
+        Generate SQL for several prompts against the same schema in one batch.
+        
+        Args:
+            user_prompts: Natural language queries
+            schema_json: Database schema in JSON format
+            chat_history: Previous conversation context
+            
+        Returns:
+            Generated SQL queries, in the same order as user_prompts
+        """
+        if self.llm is None:
+            return ["❌ LLM not configured. Please set up OpenAI API key."] * len(user_prompts)
+        
+        try:
+            logger.info(f"Generating SQL queries for {len(user_prompts)} prompt(s)")
             
-            # Build a concise schema representation
-            schema_summary = self._build_schema_summary(schema_data)
+            prompts = [
+                self._build_prompt(user_prompt, schema_json, chat_history)
+                for user_prompt in user_prompts
+            ]
+            responses = await self.llm.abatch(prompts)
+            return [self._parse_response(response) for response in responses]
             
-            # Create query generation prompt
-            prompt = f"""
+        except Exception as e:
+            return [self._format_error(e)] * len(user_prompts)
+    
+    def _build_prompt(
+        self,
+        user_prompt: str,
+        schema_json: str,
+        chat_history: Optional[str] = ""
+    ) -> str:
+        """Build the query generation prompt."""
+        # Build a concise schema representation (cached per schema JSON)
+        schema_summary = _summarize_schema(schema_json)
+        
+        return f"""
             You are an expert SQL query generator. Generate a SQL query based on the user's request.
             
             DATABASE SCHEMA:
@@ -85,63 +189,30 @@ class GenerateQueryTool(BaseTool):
             
             SQL Query:
             """
-            
-            response = self.llm.invoke(prompt)
-            sql_query = response.content.strip()
-            
-            # Clean up the query (remove markdown formatting if present)
-            sql_query = self._clean_sql_query(sql_query)
-            
-            logger.info(f"✅ Generated SQL query: {sql_query[:100]}...")
-            return sql_query
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid schema JSON: {str(e)}")
-            return f"❌ Invalid schema JSON: {str(e)}"
-        except Exception as e:
-            logger.error(f"Query generation failed: {str(e)}")
-            return f"❌ Failed to generate query: {str(e)}"
     
-    async def _arun(self, *args, **kwargs) -> str:
-        """Async version (not implemented)."""
-        return self._run(*args, **kwargs)
-    
-    def _build_schema_summary(self, schema_data: dict) -> str:
-        """Build a concise schema summary for the prompt."""
-        summary_parts = []
+    def _parse_response(self, response) -> str:
+        """Extract and clean the SQL query from an LLM response."""
+        sql_query = response.content.strip()
         
-        for table_name, table_info in schema_data.get("tables", {}).items():
-            columns = table_info.get("columns", [])
-            col_names = [f"{col['name']} ({col['type']})" for col in columns]
-            
-            pk = table_info.get("primary_keys", [])
-            fk = table_info.get("foreign_keys", [])
-            
-            table_summary = f"Table: {table_name}\n"
-            table_summary += f"  Columns: {', '.join(col_names)}\n"
-            
-            if pk:
-                table_summary += f"  Primary Key: {', '.join(pk)}\n"
-            
-            if fk:
-                fk_info = [
-                    f"{fk_item['columns']} -> {fk_item['refers_to_table']}.{fk_item['refers_to_columns']}"
-                    for fk_item in fk
-                ]
-                table_summary += f"  Foreign Keys: {'; '.join(fk_info)}\n"
-            
-            summary_parts.append(table_summary)
+        # Clean up the query (remove markdown formatting if present)
+        sql_query = self._clean_sql_query(sql_query)
         
-        return "\n".join(summary_parts)
+        logger.info(f"✅ Generated SQL query: {sql_query[:100]}...")
+        return sql_query
+    
+    def _format_error(self, error: Exception) -> str:
+        """Log a generation failure and turn it into a user-facing message."""
+        if isinstance(error, json.JSONDecodeError):
+            logger.error(f"Invalid schema JSON: {str(error)}")
+            return f"❌ Invalid schema JSON: {str(error)}"
+        
+        logger.error(f"Query generation failed: {str(error)}")
+        return f"❌ Failed to generate query: {str(error)}"
     
     def _clean_sql_query(self, query: str) -> str:
         """Clean SQL query from markdown formatting."""
-        # Remove markdown code blocks
-        query = re.sub(r'```sql\s*', '', query)
-        query = re.sub(r'```\s*', '', query)
-        
-        # Remove extra whitespace
-        query = query.strip()
+        # Remove markdown code blocks and extra whitespace
+        query = _MD_FENCE_RE.sub('', query).strip()
         
         # Ensure query ends with semicolon
         if not query.endswith(';'):
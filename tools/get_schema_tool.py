@@ -2,10 +2,12 @@
 from typing import Optional, Type, Dict, List, Any
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
-from sqlalchemy import inspect, MetaData
+from sqlalchemy import inspect, select, MetaData
 from sqlalchemy.engine import Engine
 from config.logging import get_logger
 import json
+import time
+import asyncio
 
 logger = get_logger(__name__)
 
@@ -16,6 +18,10 @@ class GetSchemaInput(BaseModel):
         default=False, 
         description="Whether to include sample data from each table"
     )
+    force_refresh: bool = Field(
+        default=False,
+        description="Re-read the schema from the database even if it is cached"
+    )
 
 
 class GetSchemaTool(BaseTool):
@@ -31,14 +37,20 @@ class GetSchemaTool(BaseTool):
     
     # Reference to database engine
     engine: Optional[Engine] = None
+    # Seconds a cached schema stays valid
+    cache_ttl: float = 300.0
     _cached_schema: Optional[Dict[str, Any]] = None
+    _cached_schema_json: Optional[str] = None
+    _cached_engine: Optional[Engine] = None
+    _cached_at: float = 0.0
     
-    def _run(self, include_sample_data: bool = False) -> str:
+    def _run(self, include_sample_data: bool = False, force_refresh: bool = False) -> str:
         """
         Extract database schema.
         
         Args:
             include_sample_data: Whether to include sample data
+            force_refresh: Ignore the cached schema and re-read it
             
         Returns:
             JSON string with schema information
@@ -46,6 +58,10 @@ class GetSchemaTool(BaseTool):
         if self.engine is None:
             return "❌ No database connection. Please connect to a database first."
         
+        if not include_sample_data and not force_refresh and self._cache_valid():
+            logger.debug("Using cached database schema")
+            return self._cached_schema_json
+        
         try:
             logger.info("Extracting database schema...")
             
@@ -59,7 +75,12 @@ class GetSchemaTool(BaseTool):
             table_names = inspector.get_table_names()
             schema_info["total_tables"] = len(table_names)
             
+            # Reflect every table in one pass instead of per-table inspector calls
+            metadata = MetaData()
+            metadata.reflect(bind=self.engine, only=table_names)
+            
             for table_name in table_names:
+                table = metadata.tables[table_name]
                 table_info = {
                     "columns": [],
                     "primary_keys": [],
@@ -68,65 +89,86 @@ class GetSchemaTool(BaseTool):
                 }
                 
                 # Get columns
-                columns = inspector.get_columns(table_name)
-                for col in columns:
+                for col in table.columns:
+                    default = col.server_default.arg if col.server_default is not None else None
                     table_info["columns"].append({
-                        "name": col["name"],
-                        "type": str(col["type"]),
-                        "nullable": col["nullable"],
-                        "default": str(col.get("default", "")),
+                        "name": col.name,
+                        "type": str(col.type),
+                        "nullable": col.nullable,
+                        "default": str(default),
                     })
                 
                 # Get primary keys
-                pk = inspector.get_pk_constraint(table_name)
-                if pk and pk.get("constrained_columns"):
-                    table_info["primary_keys"] = pk["constrained_columns"]
+                table_info["primary_keys"] = [col.name for col in table.primary_key.columns]
                 
                 # Get foreign keys
-                fks = inspector.get_foreign_keys(table_name)
-                for fk in fks:
+                for fk in table.foreign_key_constraints:
                     table_info["foreign_keys"].append({
-                        "columns": fk["constrained_columns"],
-                        "refers_to_table": fk["referred_table"],
-                        "refers_to_columns": fk["referred_columns"],
+                        "columns": list(fk.column_keys),
+                        "refers_to_table": fk.referred_table.name,
+                        "refers_to_columns": [element.column.name for element in fk.elements],
                     })
                 
                 # Get indexes
-                indexes = inspector.get_indexes(table_name)
-                for idx in indexes:
+                for idx in table.indexes:
                     table_info["indexes"].append({
-                        "name": idx["name"],
-                        "columns": idx["column_names"],
-                        "unique": idx["unique"],
+                        "name": idx.name,
+                        "columns": [col.name for col in idx.columns],
+                        "unique": idx.unique,
                     })
                 
-                # Get sample data if requested
-                if include_sample_data:
-                    try:
-                        with self.engine.connect() as conn:
-                            result = conn.execute(
-                                f"SELECT * FROM {table_name} LIMIT 3"
-                            )
-                            sample_data = [dict(row) for row in result]
-                            table_info["sample_data"] = sample_data
-                    except Exception as e:
-                        logger.warning(f"Could not fetch sample data for {table_name}: {e}")
-                
                 schema_info["tables"][table_name] = table_info
             
-            # Cache the schema
-            self._cached_schema = schema_info
+            # Get sample data if requested
+            if include_sample_data:
+                self._add_sample_data(schema_info["tables"], metadata)
+            
+            schema_json = json.dumps(schema_info, indent=2, default=str)
+            
+            # Cache the schema; sample rows are per-call extras and stay out of it
+            if not include_sample_data:
+                self._cached_schema = schema_info
+                self._cached_schema_json = schema_json
+                self._cached_engine = self.engine
+                self._cached_at = time.monotonic()
             
             logger.info(f"✅ Schema extracted: {len(table_names)} tables found")
-            return json.dumps(schema_info, indent=2, default=str)
+            return schema_json
             
         except Exception as e:
             logger.error(f"Schema extraction failed: {str(e)}")
             return f"❌ Failed to extract schema: {str(e)}"
     
     async def _arun(self, *args, **kwargs) -> str:
-        """Async version (not implemented)."""
-        return self._run(*args, **kwargs)
+        """Async version: run the blocking extraction in a worker thread."""
+        return await asyncio.to_thread(self._run, *args, **kwargs)
+    
+    def _add_sample_data(self, tables: Dict[str, Dict[str, Any]], metadata: MetaData) -> None:
+        """Fetch up to 3 sample rows per table over a single connection."""
+        with self.engine.connect() as conn:
+            for table_name, table_info in tables.items():
+                try:
+                    # Built from reflected metadata so the dialect quotes identifiers
+                    result = conn.execute(select(metadata.tables[table_name]).limit(3))
+                    table_info["sample_data"] = [dict(row._mapping) for row in result]
+                except Exception as e:
+                    conn.rollback()
+                    logger.warning(f"Could not fetch sample data for {table_name}: {e}")
+    
+    def invalidate_cache(self) -> None:
+        """Drop the cached schema so the next call re-reads it."""
+        self._cached_schema = None
+        self._cached_schema_json = None
+        self._cached_engine = None
+        self._cached_at = 0.0
+    
+    def _cache_valid(self) -> bool:
+        """Check whether the cached schema belongs to the current engine and is fresh."""
+        return (
+            self._cached_schema_json is not None
+            and self._cached_engine is self.engine
+            and time.monotonic() - self._cached_at < self.cache_ttl
+        )
     
     def get_cached_schema(self) -> Optional[Dict[str, Any]]:
         """Get cached schema information."""
@@ -1,18 +1,36 @@
 """Multi-database query tool for myquery."""
-from typing import Optional, Type, List, Dict, Any
+from typing import Optional, Type, List, Dict, Any, Sequence
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
+from sqlalchemy import text
 from core.multi_db_manager import MultiDBManager
 from config.logging import get_logger
-import json
+import orjson
+import re
+import asyncio
+import copy
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logger = get_logger(__name__)
 
+# Upper bound on databases queried at the same time
+_MAX_WORKERS = 16
+
+# Connection selector that targets every registered connection
+_ALL_CONNECTIONS = "all"
+_SPLIT_CONNECTIONS = re.compile(r"\s*,\s*").split
+
+# Compact by default: the output is usually read by an LLM, where indentation
+# only costs tokens
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+_ORJSON_PRETTY_OPTIONS = _ORJSON_OPTIONS | orjson.OPT_INDENT_2
+
 
 class MultiDBQueryInput(BaseModel):
     """Input schema for MultiDBQueryTool."""
-    model_config = {"protected_namespaces": ()}
+    # Validated on every tool call: immutable and strict about unknown fields
+    model_config = {"protected_namespaces": (), "frozen": True, "extra": "forbid"}
     
     query: str = Field(description="SQL query to execute on all databases")
     connections: Optional[str] = Field(
@@ -31,6 +49,14 @@ class MultiDBQueryInput(BaseModel):
         default=None,
         description="Column name to use as key for join merge"
     )
+    max_rows: Optional[int] = Field(
+        default=None,
+        description="Maximum rows to fetch from each database (all rows if not set)"
+    )
+    pretty: Optional[bool] = Field(
+        default=False,
+        description="Indent the JSON output for human reading"
+    )
 
 
 class MultiDBQueryTool(BaseTool):
@@ -47,6 +73,7 @@ class MultiDBQueryTool(BaseTool):
     args_schema: Type[BaseModel] = MultiDBQueryInput
     
     manager: Optional[MultiDBManager] = None
+    yield_per: int = 10000
     
     def _run(
         self,
@@ -55,6 +82,8 @@ class MultiDBQueryTool(BaseTool):
         merge_results: bool = False,
         merge_type: str = "union",
         merge_key: Optional[str] = None,
+        max_rows: Optional[int] = None,
+        pretty: bool = False,
     ) -> str:
         """
         Execute query on multiple databases with optional merge/join.
@@ -65,6 +94,8 @@ class MultiDBQueryTool(BaseTool):
             merge_results: Whether to merge results into single dataset
             merge_type: Merge type (union or join)
             merge_key: Column name for join operations
+            max_rows: Maximum rows to fetch from each database
+            pretty: Whether to indent the JSON output
             
         Returns:
             Combined results from all databases
@@ -75,75 +106,219 @@ class MultiDBQueryTool(BaseTool):
         try:
             logger.info(f"Executing multi-DB query: {query[:100]}...")
             
-            # Get list of connections to query
-            if connections.lower() == "all":
-                conn_list = self.manager.list_connections()
-            else:
-                conn_list = [c.strip() for c in connections.split(",")]
-            
+            conn_list = self._resolve_connections(connections)
             if not conn_list:
                 return "❌ No database connections available"
             
-            # Execute query on each connection
-            results = {}
+            # Execute query on each connection concurrently; each engine has its
+            # own pool, so the wall-clock cost is the slowest database, not the sum.
+            # Replicas of the same data run the query only once
+            results = dict.fromkeys(conn_list)
+            groups = self._group_replicas(results)
             
-            for conn_name in conn_list:
-                engine = self.manager.get_connection(conn_name)
-                if not engine:
-                    results[conn_name] = {
-                        "success": False,
-                        "error": "Connection not found",
-                    }
-                    continue
-                
-                try:
-                    with engine.connect() as conn:
-                        result = conn.execute(query)
-                        rows = result.fetchall()
-                        columns = list(result.keys())
-                        
+            with ThreadPoolExecutor(max_workers=min(len(groups), _MAX_WORKERS)) as executor:
+                futures = {
+                    executor.submit(self._run_one, conn_name, query, max_rows): conn_name
+                    for conn_name in groups
+                }
+                for future in as_completed(futures):
+                    conn_name = futures[future]
+                    try:
+                        results[conn_name] = future.result()
+                    except Exception as e:
                         results[conn_name] = {
-                            "success": True,
-                            "columns": columns,
-                            "data": [dict(zip(columns, row)) for row in rows],
-                            "row_count": len(rows),
+                            "success": False,
+                            "error": str(e),
                         }
-                except Exception as e:
+            
+            self._share_replica_results(results, groups)
+            return self._format_results(results, merge_results, merge_type, merge_key, pretty)
+            
+        except Exception as e:
+            logger.error(f"Multi-DB query failed: {str(e)}")
+            return f"❌ Failed to execute multi-DB query: {str(e)}"
+    
+    async def _arun(
+        self,
+        query: str,
+        connections: str = "all",
+        merge_results: bool = False,
+        merge_type: str = "union",
+        merge_key: Optional[str] = None,
+        max_rows: Optional[int] = None,
+        pretty: bool = False,
+    ) -> str:
+        """Async version: awaits every connection concurrently without blocking the event loop."""
+        if self.manager is None:
+            return "❌ Multi-database manager not initialized"
+        
+        try:
+            logger.info(f"Executing multi-DB query: {query[:100]}...")
+            
+            conn_list = self._resolve_connections(connections)
+            if not conn_list:
+                return "❌ No database connections available"
+            
+            # Deduplicated names, in order, as in the sync path
+            results = dict.fromkeys(conn_list)
+            groups = self._group_replicas(results)
+            outcomes = await asyncio.gather(
+                *(asyncio.to_thread(self._run_one, conn_name, query, max_rows) for conn_name in groups),
+                return_exceptions=True,
+            )
+            
+            for conn_name, outcome in zip(groups, outcomes):
+                if isinstance(outcome, Exception):
                     results[conn_name] = {
                         "success": False,
-                        "error": str(e),
+                        "error": str(outcome),
                     }
+                else:
+                    results[conn_name] = outcome
             
-            # Merge results if requested
-            if merge_results and len(results) > 1:
-                try:
-                    merged_data = self._merge_results(
-                        results,
-                        merge_type=merge_type,
-                        merge_key=merge_key
-                    )
-                    logger.info(f"✅ Multi-DB query completed and merged: {len(results)} database(s)")
-                    return json.dumps(merged_data, indent=2, default=str)
-                except Exception as e:
-                    logger.error(f"Merge failed: {str(e)}")
-                    # Return unmerged results with error note
-                    error_note = {
-                        "merge_error": str(e),
-                        "note": "Returning unmerged results",
-                        "individual_results": results
-                    }
-                    return json.dumps(error_note, indent=2, default=str)
+            self._share_replica_results(results, groups)
             
-            logger.info(f"✅ Multi-DB query completed: {len(results)} database(s)")
-            return json.dumps(results, indent=2, default=str)
+            # Merging is CPU-bound pandas/orjson work; keep it off the event loop
+            return await asyncio.to_thread(
+                self._format_results, results, merge_results, merge_type, merge_key, pretty
+            )
             
         except Exception as e:
             logger.error(f"Multi-DB query failed: {str(e)}")
             return f"❌ Failed to execute multi-DB query: {str(e)}"
     
-    async def _arun(self, *args, **kwargs) -> str:
-        """Async version (not implemented)."""
-        return self._run(*args, **kwargs)
+    def _resolve_connections(self, connections: str) -> Sequence[str]:
+        """Turn the connections argument into the connection names to query."""
+        connections = connections.strip()
+        if connections.lower() == _ALL_CONNECTIONS:
+            return self.manager.list_connections()
+        return _SPLIT_CONNECTIONS(connections)
+    
+    def _group_replicas(self, conn_names: Sequence[str]) -> Dict[str, List[str]]:
+        """
+        Group connections that share a replica group.
+        
+        Args:
+            conn_names: Connection names to query
+            
+        Returns:
+            Mapping of the connection that runs the query to every connection
+            served by its result (itself first)
+        """
+        groups = {}
+        group_leaders = {}
+        
+        for conn_name in conn_names:
+            replica_group = self.manager.get_replica_group(conn_name)
+            leader = group_leaders.setdefault(replica_group, conn_name) if replica_group else conn_name
+            groups.setdefault(leader, []).append(conn_name)
+        
+        return groups
+    
+    def _share_replica_results(self, results: Dict[str, dict], groups: Dict[str, List[str]]):
+        """Copy each group's result to the other members of its replica group."""
+        for leader, members in groups.items():
+            for member in members[1:]:
+                # Shallow copy: the row data is shared, only the labels differ
+                shared = copy.copy(results[leader])
+                shared["replica_of"] = leader
+                results[member] = shared
+    
+    def _format_results(
+        self,
+        results: Dict[str, dict],
+        merge_results: bool,
+        merge_type: str,
+        merge_key: Optional[str],
+        pretty: bool = False,
+    ) -> str:
+        """Merge per-connection results if requested and serialize them to JSON."""
+        options = _ORJSON_PRETTY_OPTIONS if pretty else _ORJSON_OPTIONS
+        
+        if merge_results and len(results) > 1:
+            try:
+                merged_data = self._merge_results(
+                    results,
+                    merge_type=merge_type,
+                    merge_key=merge_key
+                )
+                logger.info(f"✅ Multi-DB query completed and merged: {len(results)} database(s)")
+                return orjson.dumps(merged_data, default=str, option=options).decode()
+            except Exception as e:
+                logger.error(f"Merge failed: {str(e)}")
+                # Return unmerged results with error note
+                error_note = {
+                    "merge_error": str(e),
+                    "note": "Returning unmerged results",
+                    "individual_results": self._rows_to_data(results)
+                }
+                return orjson.dumps(error_note, default=str, option=options).decode()
+        
+        logger.info(f"✅ Multi-DB query completed: {len(results)} database(s)")
+        return orjson.dumps(self._rows_to_data(results), default=str, option=options).decode()
+    
+    def _rows_to_data(self, results: Dict[str, dict]) -> Dict[str, dict]:
+        """Replace each result's tuple rows with the row dicts returned to callers."""
+        output = {}
+        
+        for conn_name, result in results.items():
+            columns = result.get("columns", [])
+            output[conn_name] = {
+                ("data" if key == "rows" else key): (
+                    [dict(zip(columns, row)) for row in value] if key == "rows" else value
+                )
+                for key, value in result.items()
+            }
+        
+        return output
+    
+    def _run_one(self, conn_name: str, query: str, max_rows: Optional[int] = None) -> dict:
+        """
+        Execute query on a single connection.
+        
+        Args:
+            conn_name: Connection name
+            query: SQL query to execute
+            max_rows: Maximum rows to fetch (all rows if None)
+            
+        Returns:
+            Result dict for this connection
+        """
+        engine = self.manager.get_connection(conn_name)
+        if not engine:
+            return {
+                "success": False,
+                "error": "Connection not found",
+            }
+        
+        with engine.connect() as conn:
+            # Server-side cursor: rows arrive in batches of yield_per instead
+            # of being buffered in full by the driver before we copy them
+            conn = conn.execution_options(stream_results=True, yield_per=self.yield_per)
+            result = conn.execute(text(query))
+            columns = list(result.keys())
+            rows = []
+            truncated = False
+            
+            # Rows travel as plain tuples alongside one column list; they only
+            # become dicts when serialized (see _format_results)
+            for partition in result.partitions():
+                rows.extend(map(tuple, partition))
+                if max_rows is not None and len(rows) >= max_rows:
+                    truncated = len(rows) > max_rows or result.fetchone() is not None
+                    del rows[max_rows:]
+                    break
+            result.close()
+            
+            response = {
+                "success": True,
+                "columns": columns,
+                "rows": rows,
+                "row_count": len(rows),
+            }
+            if truncated:
+                response["truncated"] = True
+            return response
     
     def _merge_results(
         self,
@@ -201,14 +376,15 @@ class MultiDBQueryTool(BaseTool):
         
         # Combine data from all databases
         for db_name, result in results.items():
-            data = result.get("data", [])
+            columns = result.get("columns", [])
             
-            # Add source database column
-            for row in data:
-                row_with_source = {"_source_db": db_name}
-                # Ensure all columns present (fill missing with None)
-                for col in all_columns:
-                    row_with_source[col] = row.get(col, None)
+            # Source database column plus every column pre-filled with None;
+            # copying it and updating from the row keeps the column order
+            # while doing the per-column work in C
+            template = {"_source_db": db_name, **dict.fromkeys(all_columns)}
+            for row in result.get("rows", []):
+                row_with_source = template.copy()
+                row_with_source.update(zip(columns, row))
                 all_data.append(row_with_source)
         
         return {
@@ -243,39 +419,53 @@ class MultiDBQueryTool(BaseTool):
         dfs = {}
         
         for db_name, result in results.items():
-            data = result.get("data", [])
-            if not data:
+            rows = result.get("rows", [])
+            if not rows:
                 continue
             
-            df = pd.DataFrame(data)
+            columns = result.get("columns", [])
             
             # Check if merge key exists
-            if merge_key not in df.columns:
+            if merge_key not in columns:
                 raise ValueError(f"Merge key '{merge_key}' not found in {db_name}")
             
-            # Add suffix to column names (except merge key)
-            df = df.rename(columns={
-                col: f"{col}_{db_name}" if col != merge_key else col
+            # Tuple rows plus a column list is pandas' fast construction path;
+            # duplicate names keep the last value, as the row dicts did
+            df = pd.DataFrame(rows, columns=columns)
+            df = df.loc[:, ~df.columns.duplicated(keep='last')]
+            
+            # Suffix column names (except merge key) in place
+            df.columns = [
+                f"{col}_{db_name}" if col != merge_key else col
                 for col in df.columns
-            })
+            ]
             
             dfs[db_name] = df
         
         if not dfs:
             raise ValueError("No data available for join")
         
-        # Perform sequential outer joins
-        merged_df = None
-        for db_name, df in dfs.items():
-            if merged_df is None:
-                merged_df = df
-            else:
+        frames = list(dfs.values())
+        
+        if all(df[merge_key].is_unique for df in frames):
+            # Unique keys: align every frame on the key index in a single outer
+            # concat instead of growing an intermediate frame merge by merge
+            merged_df = pd.concat(
+                [df.set_index(merge_key) for df in frames],
+                axis=1,
+                join='outer',
+                sort=True,
+            ).rename_axis(merge_key).reset_index()
+        else:
+            # Duplicate keys need merge's many-to-many semantics
+            merged_df = frames[0]
+            for df in frames[1:]:
                 merged_df = pd.merge(
                     merged_df,
                     df,
                     on=merge_key,
                     how='outer',
-                    suffixes=('', f'_{db_name}')
+                    validate='many_to_many',
                 )
         
         # Convert back to dict format
@@ -1,17 +1,61 @@
 """Query optimization suggestion tool for myquery."""
-from typing import Optional, Type
+from typing import Optional, Type, List
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
+from langchain.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 from config.logging import get_logger
-import json
 import re
+from collections import Counter
 
 logger = get_logger(__name__)
 
+# Static analysis patterns, matched case-insensitively against the raw query
+_SELECT_STAR_RE = re.compile(r'\bSELECT\s+\*', re.IGNORECASE)
+_WHERE_OR_RE = re.compile(r'\bWHERE\b.*\bOR\b', re.IGNORECASE | re.DOTALL)
+_WHERE_FUNCTION_RE = re.compile(
+    r'\bWHERE\b.*\b(UPPER|LOWER|SUBSTRING|DATE)\s*\(', re.IGNORECASE | re.DOTALL
+)
+_IMPLICIT_CONVERSION_RE = re.compile(r"WHERE\s+\w+\s*=\s*'\d+'", re.IGNORECASE)
+_LEADING_WILDCARD_RE = re.compile(r"LIKE\s+'%", re.IGNORECASE)
+
+# Identifier/keyword tokens, so keywords inside names (e.g. joined_at) don't count
+_TOKEN_RE = re.compile(r'[A-Z_][A-Z0-9_]*')
+_KEYWORD_PAIRS = {"GROUP BY", "ORDER BY", "NOT IN"}
+_AGGREGATES = ("COUNT", "SUM", "AVG", "MAX", "MIN")
+
+_OPTIMIZATION_PROMPT = PromptTemplate.from_template("""
+            Analyze this SQL query and provide specific optimization suggestions.
+            
+            SQL Query:
+            {sql_query}
+            {schema_context}
+            
+            Please provide:
+            1. Performance optimization suggestions
+            2. Index recommendations (if schema provided)
+            3. Query rewrite suggestions (if applicable)
+            4. Estimated impact of each suggestion
+            
+            Be concise and practical. Focus on actionable improvements.
+            """)
+
+
+def _keyword_counts(sql_query: str) -> Counter:
+    """Count keyword tokens (and two-word keywords) in a single pass over the query."""
+    tokens = _TOKEN_RE.findall(sql_query.upper())
+    counts = Counter(tokens)
+    counts.update(
+        pair for pair in map(" ".join, zip(tokens, tokens[1:]))
+        if pair in _KEYWORD_PAIRS
+    )
+    return counts
+
 
 class QueryOptimizationInput(BaseModel):
     """Input schema for QueryOptimizationTool."""
+    model_config = {"frozen": True, "extra": "forbid"}
+    
     sql_query: str = Field(description="SQL query to optimize")
     schema_json: Optional[str] = Field(
         default=None,
@@ -104,10 +148,10 @@ class QueryOptimizationTool(BaseTool):
     def _static_analysis(self, sql_query: str) -> list:
         """Perform static analysis on SQL query."""
         issues = []
-        query_upper = sql_query.upper()
+        counts = _keyword_counts(sql_query)
         
         # Check for SELECT *
-        if re.search(r'\bSELECT\s+\*', query_upper):
+        if _SELECT_STAR_RE.search(sql_query):
             issues.append({
                 'type': 'SELECT *',
                 'message': 'Using SELECT * can be inefficient',
@@ -115,8 +159,8 @@ class QueryOptimizationTool(BaseTool):
             })
         
         # Check for missing WHERE clause in SELECT
-        if 'SELECT' in query_upper and 'WHERE' not in query_upper and 'LIMIT' not in query_upper:
-            if 'FROM' in query_upper:
+        if counts['SELECT'] and not counts['WHERE'] and not counts['LIMIT']:
+            if counts['FROM']:
                 issues.append({
                     'type': 'No WHERE clause',
                     'message': 'Query may return entire table',
@@ -124,7 +168,7 @@ class QueryOptimizationTool(BaseTool):
                 })
         
         # Check for OR in WHERE clause (can prevent index usage)
-        if re.search(r'\bWHERE\b.*\bOR\b', query_upper, re.DOTALL):
+        if _WHERE_OR_RE.search(sql_query):
             issues.append({
                 'type': 'OR in WHERE',
                 'message': 'OR conditions can prevent index usage',
@@ -132,7 +176,7 @@ class QueryOptimizationTool(BaseTool):
             })
         
         # Check for NOT IN with subquery
-        if 'NOT IN' in query_upper and '(' in sql_query:
+        if counts['NOT IN'] and '(' in sql_query:
             issues.append({
                 'type': 'NOT IN with subquery',
                 'message': 'NOT IN with subqueries can be slow',
@@ -140,7 +184,7 @@ class QueryOptimizationTool(BaseTool):
             })
         
         # Check for function on indexed column in WHERE
-        if re.search(r'\bWHERE\b.*\b(UPPER|LOWER|SUBSTRING|DATE)\s*\(', query_upper, re.DOTALL):
+        if _WHERE_FUNCTION_RE.search(sql_query):
             issues.append({
                 'type': 'Function on column',
                 'message': 'Functions on columns in WHERE prevent index usage',
@@ -148,7 +192,7 @@ class QueryOptimizationTool(BaseTool):
             })
         
         # Check for implicit type conversion
-        if re.search(r"WHERE\s+\w+\s*=\s*'\d+'", sql_query, re.IGNORECASE):
+        if _IMPLICIT_CONVERSION_RE.search(sql_query):
             issues.append({
                 'type': 'Implicit conversion',
                 'message': 'Comparing numeric column with string can prevent index usage',
@@ -156,8 +200,8 @@ class QueryOptimizationTool(BaseTool):
             })
         
         # Check for multiple JOINs without WHERE
-        join_count = query_upper.count('JOIN')
-        if join_count >= 3 and 'WHERE' not in query_upper:
+        join_count = counts['JOIN']
+        if join_count >= 3 and not counts['WHERE']:
             issues.append({
                 'type': 'Multiple JOINs',
                 'message': f'{join_count} JOINs without WHERE clause may be inefficient',
@@ -165,7 +209,7 @@ class QueryOptimizationTool(BaseTool):
             })
         
         # Check for LIKE with leading wildcard
-        if re.search(r"LIKE\s+'%", query_upper):
+        if _LEADING_WILDCARD_RE.search(sql_query):
             issues.append({
                 'type': 'Leading wildcard',
                 'message': 'LIKE with leading % prevents index usage',
@@ -173,7 +217,7 @@ class QueryOptimizationTool(BaseTool):
             })
         
         # Check for DISTINCT with ORDER BY
-        if 'DISTINCT' in query_upper and 'ORDER BY' in query_upper:
+        if counts['DISTINCT'] and counts['ORDER BY']:
             issues.append({
                 'type': 'DISTINCT with ORDER BY',
                 'message': 'DISTINCT with ORDER BY requires additional sorting',
@@ -188,35 +232,43 @@ class QueryOptimizationTool(BaseTool):
             return ""
         
         try:
-            schema_context = ""
-            if schema_json:
-                schema_data = json.loads(schema_json)
-                tables = schema_data.get('tables', {})
-                schema_context = f"\n\nDatabase Schema:\n{json.dumps(tables, indent=2)}"
-            
-            prompt = f"""
-            Analyze this SQL query and provide specific optimization suggestions.
-            
-            SQL Query:
-            {sql_query}
-            {schema_context}
-            
-            Please provide:
-            1. Performance optimization suggestions
-            2. Index recommendations (if schema provided)
-            3. Query rewrite suggestions (if applicable)
-            4. Estimated impact of each suggestion
-            
-            Be concise and practical. Focus on actionable improvements.
-            """
-            
-            response = self.llm.invoke(prompt)
+            response = self.llm.invoke(self._build_prompt(sql_query, schema_json))
             return response.content
             
         except Exception as e:
             logger.warning(f"AI optimization failed: {str(e)}")
             return ""
     
+    def _ai_optimization_batch(self, sql_queries: List[str], schema_json: Optional[str]) -> List[str]:
+        """
+        Get AI-powered optimization suggestions for several queries at once.
+        
+        Args:
+            sql_queries: SQL queries to analyze
+            schema_json: Optional schema context shared by all queries
+            
+        Returns:
+            Suggestions for each query, in the same order as sql_queries
+        """
+        if not self.llm:
+            return [""] * len(sql_queries)
+        
+        try:
+            prompts = [self._build_prompt(sql_query, schema_json) for sql_query in sql_queries]
+            responses = self.llm.batch(prompts)
+            return [response.content for response in responses]
+            
+        except Exception as e:
+            logger.warning(f"AI optimization failed: {str(e)}")
+            return [""] * len(sql_queries)
+    
+    def _build_prompt(self, sql_query: str, schema_json: Optional[str]) -> str:
+        """Build the optimization prompt."""
+        # The schema JSON goes into the prompt as-is; re-parsing and
+        # re-serializing it only to pretty-print the tables buys the LLM nothing
+        schema_context = f"\n\nDatabase Schema:\n{schema_json}" if schema_json else ""
+        return _OPTIMIZATION_PROMPT.format(sql_query=sql_query, schema_context=schema_context)
+    
     def get_query_complexity_score(self, sql_query: str) -> dict:
         """
         Calculate query complexity score.
@@ -224,22 +276,16 @@ class QueryOptimizationTool(BaseTool):
         Returns:
             Dict with complexity metrics
         """
-        query_upper = sql_query.upper()
+        counts = _keyword_counts(sql_query)
         
         metrics = {
-            'join_count': query_upper.count('JOIN'),
-            'subquery_count': sql_query.count('SELECT') - 1,  # -1 for main query
-            'aggregate_count': sum([
-                query_upper.count('COUNT'),
-                query_upper.count('SUM'),
-                query_upper.count('AVG'),
-                query_upper.count('MAX'),
-                query_upper.count('MIN'),
-            ]),
-            'has_group_by': 'GROUP BY' in query_upper,
-            'has_having': 'HAVING' in query_upper,
-            'has_order_by': 'ORDER BY' in query_upper,
-            'has_distinct': 'DISTINCT' in query_upper,
+            'join_count': counts['JOIN'],
+            'subquery_count': max(counts['SELECT'] - 1, 0),  # -1 for main query
+            'aggregate_count': sum(counts[name] for name in _AGGREGATES),
+            'has_group_by': counts['GROUP BY'] > 0,
+            'has_having': counts['HAVING'] > 0,
+            'has_order_by': counts['ORDER BY'] > 0,
+            'has_distinct': counts['DISTINCT'] > 0,
         }
         
         # Calculate complexity score (0-100)
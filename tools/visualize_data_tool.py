@@ -1,16 +1,137 @@
 """Data visualization tool for myquery."""
-from typing import Optional, Type, List, Dict, Any
+from typing import Optional, Type, Any, Tuple
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
 from config.logging import get_logger
-import json
+import orjson
+import hashlib
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.io as pio
+from plotly.io.json import to_json_plotly
+from functools import lru_cache
 from pathlib import Path
+import re
+import os
+import webbrowser
 import tempfile
 
 logger = get_logger(__name__)
 
+# Row count from which line/scatter traces render with WebGL instead of SVG
+_WEBGL_MIN_POINTS = 1000
+
+# Scatter trace mode per chart type drawn with go.Scatter/go.Scattergl
+_SCATTER_MODES = {"line": "lines+markers", "scatter": "markers"}
+
+# Resolved once instead of looked up by name in Plotly's registry per chart
+_TEMPLATE = pio.templates["plotly_white"]
+
+# Empty data/layout arguments of Plotly.newPlot in the rendered page shell
+_CHART_DIV_ID = "myquery-chart"
+_FIGURE_SLOT_RE = re.compile(r'(?<="%s",)\s*\[\],\s*\{\},' % _CHART_DIV_ID)
+
+
+@lru_cache(maxsize=None)
+def _html_shell(include_plotlyjs: str) -> Tuple[bytes, bytes]:
+    """Render the page around the figure once per plotly.js mode, split at the figure slot."""
+    html = pio.to_html(
+        {"data": [], "layout": {}},
+        include_plotlyjs=include_plotlyjs,
+        full_html=True,
+        validate=False,
+        div_id=_CHART_DIV_ID,
+    )
+    prefix, suffix = _FIGURE_SLOT_RE.split(html, maxsplit=1)
+    return prefix.encode("utf-8"), suffix.encode("utf-8")
+
+
+def _layout(title: str, x_column: Optional[str] = None, y_column: Optional[str] = None) -> dict:
+    """Chart layout passed straight to go.Figure, skipping update_layout's merge pass."""
+    layout = {"title": title, "template": _TEMPLATE}
+    if x_column is not None or y_column is not None:
+        layout["xaxis_title"] = x_column
+        layout["yaxis_title"] = y_column
+    return layout
+
+
+def _downcast(values: np.ndarray) -> np.ndarray:
+    """
+    Shrink numeric arrays to the smallest dtype that holds them exactly.
+    
+    Plotly writes numeric arrays into the HTML as base64 typed arrays, so
+    int8/int16/int32/float32 payloads are 2-8x smaller than the 64-bit defaults.
+    Floats only drop to float32 when no value changes.
+    """
+    if values.dtype.kind in "iu":
+        return pd.to_numeric(values, downcast="integer")
+    
+    if values.dtype == np.float64:
+        narrowed = values.astype(np.float32)
+        if np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+            return narrowed
+    
+    return values
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    """Whether a column holds numbers, including numeric strings (e.g. serialized DECIMALs)."""
+    if pd.api.types.is_numeric_dtype(series):
+        return True
+    if series.dtype != object:
+        return False
+    
+    values = series.dropna()
+    return not values.empty and bool(pd.to_numeric(values, errors="coerce").notna().all())
+
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Pick n_out points that preserve the visual shape of a series.
+    
+    Largest-Triangle-Three-Buckets: the first and last points are kept, the rest
+    are split into buckets and each bucket keeps the point forming the largest
+    triangle with the previously kept point and the next bucket's average.
+    
+    Args:
+        x: X values (numeric, in plotting order)
+        y: Y values (numeric)
+        n_out: Number of points to keep
+        
+    Returns:
+        Indices of the kept points, in ascending order
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    prev = 0
+    
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        
+        # Third triangle vertex: average of the next bucket (or the last point)
+        if bucket < n_out - 3:
+            next_end = edges[bucket + 2]
+            avg_x = np.nanmean(x[end:next_end])
+            avg_y = np.nanmean(y[end:next_end])
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        
+        areas = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.nan_to_num(areas, nan=-1.0).argmax())
+        indices[bucket + 1] = prev
+    
+    return indices
+
 
 class VisualizeDataInput(BaseModel):
     """Input schema for VisualizeDataTool."""
@@ -27,7 +148,7 @@ class VisualizeDataInput(BaseModel):
     )
     y_column: Optional[str] = Field(
         default=None,
-        description="Column for Y axis (auto-detected if not provided)"
+        description="Column for Y axis, or comma-separated columns for a grouped bar chart (auto-detected if not provided)"
     )
     title: Optional[str] = Field(
         default="Data Visualization",
@@ -48,6 +169,12 @@ class VisualizeDataTool(BaseTool):
     args_schema: Type[BaseModel] = VisualizeDataInput
     
     output_dir: str = "outputs/visualizations"
+    max_points: int = 2000
+    # "cdn" references plotly.js online; "directory" writes one shared
+    # plotly.min.js next to the charts for offline viewing
+    include_plotlyjs: str = "cdn"
+    # Open each new chart in the browser (MYQUERY_AUTO_OPEN=1 enables it by default)
+    auto_open: bool = Field(default_factory=lambda: os.environ.get("MYQUERY_AUTO_OPEN") == "1")
     
     def __init__(self, **kwargs):
         """Initialize with output directory."""
@@ -78,7 +205,7 @@ class VisualizeDataTool(BaseTool):
         try:
             logger.info(f"Creating visualization: {chart_type}")
             
-            result_data = json.loads(query_result_json)
+            result_data = orjson.loads(query_result_json)
             
             # Check if query was successful
             if not result_data.get("success", False):
@@ -90,38 +217,47 @@ class VisualizeDataTool(BaseTool):
             if not data:
                 return "ℹ️  No data to visualize"
             
+            # Columnar view of the rows: detection reads column dtypes, and each
+            # chart slices whole columns as arrays, which Plotly also serializes
+            # as compact typed arrays
+            df = pd.DataFrame(data, columns=columns or None)
+            
             # Auto-detect chart type if needed
             if chart_type == "auto":
-                chart_type = self._detect_chart_type(data, columns)
+                chart_type = self._detect_chart_type(df)
             
             # Auto-detect columns if not provided
             if not x_column or not y_column:
-                x_column, y_column = self._detect_columns(data, columns, chart_type)
+                x_column, y_column = self._detect_columns(df, chart_type)
+            
+            # Output files are content-addressed: an identical request was already rendered
+            output_path = self._output_path(query_result_json, chart_type, x_column, y_column, title)
+            if output_path.exists():
+                logger.info(f"✅ Visualization cached: {output_path}")
+                return f"✅ Visualization created: {output_path} (cached)\n\n📊 Chart type: {chart_type}\n📈 Data points: {len(data)}"
             
             # Create visualization
             fig = self._create_chart(
-                data=data,
+                df=df,
                 chart_type=chart_type,
                 x_column=x_column,
                 y_column=y_column,
                 title=title,
             )
             
-            # Save to file
-            output_path = Path(self.output_dir) / f"chart_{hash(str(data))}.html"
-            fig.write_html(str(output_path))
+            # Save to file without inlining the ~3.5 MB plotly.js bundle
+            self._write_html(fig, output_path)
             
             logger.info(f"✅ Visualization created: {output_path}")
             
-            # Also try to open in browser (non-blocking)
-            try:
-                fig.show()
-            except:
-                pass
+            # Open the written file directly instead of fig.show(), which goes
+            # through Plotly's renderer dispatch (IPython probing, temp files)
+            if self.auto_open:
+                webbrowser.open(output_path.resolve().as_uri())
             
             return f"✅ Visualization created: {output_path}\n\n📊 Chart type: {chart_type}\n📈 Data points: {len(data)}"
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Invalid result JSON: {str(e)}")
             return f"❌ Invalid result JSON: {str(e)}"
         except Exception as e:
@@ -132,66 +268,89 @@ class VisualizeDataTool(BaseTool):
         """Async version (not implemented)."""
         return self._run(*args, **kwargs)
     
-    def _detect_chart_type(self, data: List[Dict], columns: List[str]) -> str:
+    def _write_html(self, fig: go.Figure, output_path: Path) -> None:
+        """
+        Stream the figure JSON into the cached page shell.
+        
+        Unlike fig.write_html, the page is never assembled as one string, and
+        the shell (plotly.js loader, SRI hash) is only rendered once.
+        
+        Args:
+            fig: Chart to write
+            output_path: Destination HTML file
+        """
+        prefix, suffix = _html_shell(self.include_plotlyjs)
+        fig_dict = fig.to_plotly_json()
+        
+        with open(output_path, "wb") as f:
+            f.write(prefix)
+            f.write(to_json_plotly(fig_dict["data"], engine="orjson").encode("utf-8"))
+            f.write(b", ")
+            f.write(to_json_plotly(fig_dict["layout"], engine="orjson").encode("utf-8"))
+            f.write(b",")
+            f.write(suffix)
+    
+    def _output_path(
+        self,
+        query_result_json: str,
+        chart_type: str,
+        x_column: Optional[str],
+        y_column: Optional[str],
+        title: str,
+    ) -> Path:
+        """Build the chart file path from a stable digest of the data and chart options."""
+        digest = hashlib.blake2b(query_result_json.encode("utf-8"), digest_size=8)
+        digest.update(f"\0{chart_type}\0{x_column}\0{y_column}\0{title}\0{self.max_points}\0{self.include_plotlyjs}".encode("utf-8"))
+        return Path(self.output_dir) / f"chart_{digest.hexdigest()}.html"
+    
+    def _detect_chart_type(self, df: pd.DataFrame) -> str:
         """Auto-detect best chart type for the data."""
+        columns = df.columns
         if len(columns) <= 1:
             return "table"
         
-        # Check if first column looks like categories
-        first_col = columns[0]
-        sample_values = [row.get(first_col) for row in data[:5]]
+        # If the first column is numeric, plot it against the others
+        first_col = df[columns[0]]
+        if _is_numeric(first_col):
+            return "scatter"
         
-        # If numeric data in both columns, use scatter
-        if len(columns) >= 2:
-            try:
-                float(sample_values[0])
-                return "scatter"
-            except:
-                pass
+        # Check if first column looks like categories; hash the raw values and
+        # only stringify unhashable ones (nested JSON lists/objects)
+        sample_values = first_col.head(5)
+        try:
+            unique_count = sample_values.nunique(dropna=False)
+        except TypeError:
+            unique_count = sample_values.astype(str).nunique()
         
         # If many unique values, use bar chart
-        if len(set(str(v) for v in sample_values)) == len(sample_values):
+        if unique_count == len(sample_values):
             return "bar"
         
         # If few unique values, use pie chart
-        if len(set(str(v) for v in sample_values)) <= 5:
+        if unique_count <= 5:
             return "pie"
         
         # Default to bar
         return "bar"
     
-    def _detect_columns(
-        self,
-        data: List[Dict],
-        columns: List[str],
-        chart_type: str,
-    ) -> tuple:
+    def _detect_columns(self, df: pd.DataFrame, chart_type: str) -> tuple:
         """Auto-detect X and Y columns."""
+        columns = list(df.columns)
         if len(columns) == 0:
             return None, None
         
         if len(columns) == 1:
             return columns[0], columns[0]
         
-        # For most charts, first column is X, second is Y
+        # For most charts, first column is X; Y is the first numeric column after it
         x_col = columns[0]
-        y_col = columns[1] if len(columns) > 1 else columns[0]
-        
-        # Try to find numeric column for Y axis
-        for col in columns[1:]:
-            sample_val = data[0].get(col) if data else None
-            try:
-                float(sample_val)
-                y_col = col
-                break
-            except:
-                continue
+        y_col = next((col for col in columns[1:] if _is_numeric(df[col])), columns[1])
         
         return x_col, y_col
     
     def _create_chart(
         self,
-        data: List[Dict],
+        df: pd.DataFrame,
         chart_type: str,
         x_column: Optional[str],
         y_column: Optional[str],
@@ -200,119 +359,126 @@ class VisualizeDataTool(BaseTool):
         """Create chart based on type."""
         
         if chart_type == "bar":
-            return self._create_bar_chart(data, x_column, y_column, title)
-        elif chart_type == "line":
-            return self._create_line_chart(data, x_column, y_column, title)
-        elif chart_type == "scatter":
-            return self._create_scatter_chart(data, x_column, y_column, title)
+            return self._create_bar_chart(df, x_column, y_column, title)
+        elif chart_type in _SCATTER_MODES:
+            return self._create_scatter_chart(df, x_column, y_column, title, chart_type)
         elif chart_type == "pie":
-            return self._create_pie_chart(data, x_column, y_column, title)
+            return self._create_pie_chart(df, x_column, y_column, title)
         elif chart_type == "table":
-            return self._create_table(data, title)
+            return self._create_table(df, title)
         else:
             # Default to bar
-            return self._create_bar_chart(data, x_column, y_column, title)
+            return self._create_bar_chart(df, x_column, y_column, title)
     
     def _create_bar_chart(
         self,
-        data: List[Dict],
+        df: pd.DataFrame,
         x_column: str,
         y_column: str,
         title: str,
     ) -> go.Figure:
-        """Create bar chart."""
-        x_values = [row.get(x_column) for row in data]
-        y_values = [row.get(y_column) for row in data]
+        """Create bar chart, with one grouped trace per Y column."""
+        x_values = _downcast(df[x_column].to_numpy())
         
-        fig = go.Figure(data=[
-            go.Bar(x=x_values, y=y_values)
-        ])
+        # "revenue, cost" plots several columns unless it names a real column
+        if y_column in df.columns:
+            y_columns = [y_column]
+        else:
+            y_columns = [col.strip() for col in y_column.split(",")]
         
-        fig.update_layout(
-            title=title,
-            xaxis_title=x_column,
-            yaxis_title=y_column,
-            template="plotly_white",
-        )
+        # Traces are built from our own arrays, so Plotly's per-property
+        # validators are skipped; the layout is still validated by go.Figure
+        traces = [
+            go.Bar(dict(x=x_values, y=_downcast(df[col].to_numpy()), name=col), _validate=False)
+            for col in y_columns
+        ]
         
-        return fig
+        return go.Figure(
+            data=traces,
+            layout=_layout(title, x_column, y_column),
+        )
     
-    def _create_line_chart(
+    def _create_scatter_chart(
         self,
-        data: List[Dict],
+        df: pd.DataFrame,
         x_column: str,
         y_column: str,
         title: str,
+        chart_type: str = "scatter",
     ) -> go.Figure:
-        """Create line chart."""
-        x_values = [row.get(x_column) for row in data]
-        y_values = [row.get(y_column) for row in data]
-        
-        fig = go.Figure(data=[
-            go.Scatter(x=x_values, y=y_values, mode='lines+markers')
-        ])
+        """Create line chart or scatter plot; they differ only in trace mode."""
+        x_values = _downcast(df[x_column].to_numpy())
+        y_values = _downcast(df[y_column].to_numpy())
+        x_values, y_values = self._maybe_downsample(x_values, y_values, chart_type)
         
-        fig.update_layout(
-            title=title,
-            xaxis_title=x_column,
-            yaxis_title=y_column,
-            template="plotly_white",
+        trace_cls = go.Scattergl if len(df) >= _WEBGL_MIN_POINTS else go.Scatter
+        trace = dict(x=x_values, y=y_values, mode=_SCATTER_MODES[chart_type])
+        return go.Figure(
+            data=[trace_cls(trace, _validate=False)],
+            layout=_layout(title, x_column, y_column),
         )
-        
-        return fig
     
-    def _create_scatter_chart(
+    def _maybe_downsample(
         self,
-        data: List[Dict],
-        x_column: str,
-        y_column: str,
-        title: str,
-    ) -> go.Figure:
-        """Create scatter plot."""
-        x_values = [row.get(x_column) for row in data]
-        y_values = [row.get(y_column) for row in data]
+        x_values: np.ndarray,
+        y_values: np.ndarray,
+        chart_type: str,
+    ) -> tuple:
+        """
+        Reduce large line/scatter series to max_points with LTTB.
         
-        fig = go.Figure(data=[
-            go.Scatter(x=x_values, y=y_values, mode='markers')
-        ])
+        Every point ends up serialized into the HTML, so huge series mostly cost
+        file size and browser rendering without changing what the chart shows.
         
-        fig.update_layout(
-            title=title,
-            xaxis_title=x_column,
-            yaxis_title=y_column,
-            template="plotly_white",
-        )
+        Args:
+            x_values: X axis values
+            y_values: Y axis values
+            chart_type: Chart being built (only line and scatter are reduced)
+            
+        Returns:
+            Tuple of (x_values, y_values), downsampled when needed
+        """
+        if chart_type not in ("line", "scatter") or len(x_values) <= self.max_points:
+            return x_values, y_values
         
-        return fig
+        try:
+            y = np.asarray(y_values, dtype=float)
+        except (TypeError, ValueError):
+            # Non-numeric Y has no shape to preserve
+            return x_values, y_values
+        
+        try:
+            x = np.asarray(x_values, dtype=float)
+        except (TypeError, ValueError):
+            # Dates or labels: bucket by position
+            x = np.arange(len(x_values), dtype=float)
+        
+        keep = _lttb_indices(x, y, self.max_points)
+        logger.info(f"Downsampled {chart_type} series from {len(x_values)} to {len(keep)} points")
+        return x_values[keep], y_values[keep]
     
     def _create_pie_chart(
         self,
-        data: List[Dict],
+        df: pd.DataFrame,
         x_column: str,
         y_column: str,
         title: str,
     ) -> go.Figure:
         """Create pie chart."""
-        labels = [str(row.get(x_column)) for row in data]
-        values = [row.get(y_column) for row in data]
-        
-        fig = go.Figure(data=[
-            go.Pie(labels=labels, values=values)
-        ])
+        labels = df[x_column].astype(str).to_numpy()
+        values = _downcast(df[y_column].to_numpy())
         
-        fig.update_layout(
-            title=title,
-            template="plotly_white",
+        return go.Figure(
+            data=[go.Pie(dict(labels=labels, values=values), _validate=False)],
+            layout=_layout(title),
         )
-        
-        return fig
     
-    def _create_table(self, data: List[Dict], title: str) -> go.Figure:
+    def _create_table(self, df: pd.DataFrame, title: str) -> go.Figure:
         """Create interactive table."""
-        if not data:
+        if df.empty:
             return go.Figure()
         
-        columns = list(data[0].keys())
+        columns = list(df.columns)
         
         fig = go.Figure(data=[go.Table(
             header=dict(
@@ -321,13 +487,11 @@ class VisualizeDataTool(BaseTool):
                 align='left'
             ),
             cells=dict(
-                values=[[row.get(col) for row in data] for col in columns],
+                values=[_downcast(df[col].to_numpy()) for col in columns],
                 fill_color='lavender',
                 align='left'
             )
-        )])
-        
-        fig.update_layout(title=title)
+        )], layout={"title": title})
         
         return fig
 
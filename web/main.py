@@ -1,36 +1,199 @@
 """FastAPI web application for myquery."""
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Optional, List, Any, AsyncIterator, Dict, Hashable, Iterator, NamedTuple
 from pathlib import Path
-import json
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import partial
+import anyio
+import asyncio
+import gzip
+import hashlib
+import orjson
+import os
+import time
+import uvicorn
+
+try:
+    import brotli
+except ImportError:  # optional: pip install "myquery[web]"
+    brotli = None
 
 from core.agent import QueryAgent
 from config import get_logger, settings
 
 logger = get_logger(__name__)
 
-# Create FastAPI app
+# Bundled web UI; when present it is served by a StaticFiles mount
+STATIC_DIR = Path(__file__).parent / "static"
+HAS_STATIC_UI = (STATIC_DIR / "index.html").is_file()
+
+# Stylesheet for the built-in page, served from memory at /assets/ui.css
+UI_CSS_PATH = Path(__file__).parent / "assets" / "ui.css"
+
+# Origins allowed to call the API from a browser (MYQUERY_CORS_ORIGIN_REGEX overrides)
+CORS_ORIGIN_REGEX = os.environ.get(
+    "MYQUERY_CORS_ORIGIN_REGEX",
+    r"^https?://(localhost|127\.0\.0\.1|\[::1\])(:\d+)?$",
+)
+
+# Worker threads for blocking agent calls (LLM requests, database I/O)
+THREADPOOL_SIZE = 32
+
+# Parsed /api/schema and /api/tables responses are reused for this long
+SCHEMA_CACHE_TTL = float(os.environ.get("MYQUERY_SCHEMA_CACHE_TTL", "60"))
+SCHEMA_CACHE_SIZE = int(os.environ.get("MYQUERY_SCHEMA_CACHE_SIZE", "8"))
+
+# Answers to repeated natural-language prompts skip the LLM -> SQL -> execute run
+QUERY_CACHE_TTL = float(os.environ.get("MYQUERY_QUERY_CACHE_TTL", "300"))
+QUERY_CACHE_SIZE = int(os.environ.get("MYQUERY_QUERY_CACHE_SIZE", "256"))
+# Rows /api/query answers with (ExecuteQueryTool's default row limit)
+QUERY_MAX_ROWS = 100
+# Streamed results render as they arrive, so proxies must not buffer or
+# re-encode them (X-Accel-Buffering is nginx's per-response switch)
+NDJSON_STREAM_HEADERS = {"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"}
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire a fixed time after being stored."""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+
+schema_cache = TTLCache(maxsize=SCHEMA_CACHE_SIZE, ttl=SCHEMA_CACHE_TTL)
+query_cache = TTLCache(maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+
+
+def _schema_cache_key(kind: str) -> tuple:
+    """Cache key for a schema response on the agent's current connection."""
+    return kind, id(agent.connect_db_tool.get_engine())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Size the worker thread pool before serving requests."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
+
+
+class OrjsonResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib encoder."""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+# Create FastAPI app; endpoints return OrjsonResponse directly so large
+# payloads also skip FastAPI's jsonable_encoder pass
 app = FastAPI(
     title="myquery Web UI",
     description="AI-powered database query interface",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=OrjsonResponse,
 )
 
-# Add CORS middleware
+# Add CORS middleware; credentials with a "*" origin list made Starlette echo
+# every origin back, so only local origins are allowed unless configured
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origin_regex=CORS_ORIGIN_REGEX,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
 )
 
-# Global agent instance
+class StreamingGZipMiddleware:
+    """
+    GZipMiddleware that leaves streamed media types uncompressed.
+    
+    Older Starlette gzip responders only emit what the compressor flushes on
+    its own, which would hold NDJSON lines back until the stream ends. The
+    media type is only known once the response starts, so each response is
+    routed there: excluded types go straight to the server, everything else
+    through gzip.
+    """
+    
+    def __init__(self, app, uncompressed_media_types: frozenset, **gzip_options: Any):
+        self.app = app
+        self.uncompressed_media_types = uncompressed_media_types
+        self.gzip_options = gzip_options
+    
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        async def routed_app(scope, receive, gzip_send) -> None:
+            target = gzip_send
+            
+            async def route(message) -> None:
+                nonlocal target
+                if message["type"] == "http.response.start":
+                    content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+                    media_type = content_type.split(b";", 1)[0].strip().decode("latin-1").lower()
+                    if media_type in self.uncompressed_media_types:
+                        target = send
+                await target(message)
+            
+            await self.app(scope, receive, route)
+        
+        await GZipMiddleware(routed_app, **self.gzip_options)(scope, receive, send)
+
+
+# Compress HTML/JSON bodies over 1 KB (large query results shrink 5-10x);
+# NDJSON streams are sent as is so each batch reaches the client right away
+app.add_middleware(
+    StreamingGZipMiddleware,
+    uncompressed_media_types=frozenset({"application/x-ndjson"}),
+    minimum_size=1024,
+    compresslevel=5,
+)
+
+# Global agent instance, created by the first connect and reused by every
+# request so its schema cache and connection pool survive between calls
 agent: Optional[QueryAgent] = None
+# Serializes connects so racing requests cannot build two agents
+agent_lock = asyncio.Lock()
+# Connection state, only written under agent_lock; read lock-free by handlers
+connected = False
 
 # Request models
 class ConnectRequest(BaseModel):
@@ -47,57 +210,156 @@ class QueryRequest(BaseModel):
     debug: bool = False
 
 
+class StreamQueryRequest(QueryRequest):
+    analyze: bool = False
+    max_rows: Optional[int] = Field(default=None, ge=1)
+
+
 class SQLRequest(BaseModel):
     query: str
 
 
-# Root endpoint
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """Serve the main web UI."""
-    html_file = Path(__file__).parent / "static" / "index.html"
-    if html_file.exists():
-        return FileResponse(html_file)
-    return HTMLResponse(content=get_default_html(), status_code=200)
+class StaticAsset(NamedTuple):
+    """A response body encoded, compressed and fingerprinted once at import."""
+    body: bytes
+    gzipped: bytes
+    brotli: Optional[bytes]
+    etag: str
+    media_type: str
+
+
+def build_static_asset(body: bytes, media_type: str) -> StaticAsset:
+    """
+    Precompute everything needed to serve a fixed body.
+    
+    Args:
+        body: Uncompressed response body
+        media_type: Response content type
+        
+    Returns:
+        StaticAsset with gzip (and, when available, brotli) bodies and a weak
+        ETag shared by every encoding
+    """
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    # Brotli quality 5 compresses HTML close to gzip -9 sizes or better while
+    # keeping import fast; 11 would take seconds for no practical gain
+    brotli_body = None
+    if brotli is not None:
+        brotli_body = brotli.compress(body, quality=5, mode=brotli.MODE_TEXT)
+    return StaticAsset(body, gzip.compress(body, compresslevel=9), brotli_body, etag, media_type)
+
+
+def precompressed_response(request: Request, asset: StaticAsset, headers: Optional[dict] = None) -> Response:
+    """
+    Serve a static asset, answering 304 when the client's copy is current.
+    
+    Args:
+        request: Incoming request (only If-None-Match and Accept-Encoding are read)
+        asset: Asset built by build_static_asset
+        headers: Extra response headers
+        
+    Returns:
+        304 response, or the brotli, gzipped or plain body
+    """
+    headers = dict(headers or {})
+    headers["ETag"] = asset.etag
+    headers["Vary"] = "Accept-Encoding"
+    if asset.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    accepted = {
+        token.split(";", 1)[0].strip()
+        for token in request.headers.get("accept-encoding", "").split(",")
+    }
+    if asset.brotli is not None and "br" in accepted:
+        headers["Content-Encoding"] = "br"
+        return Response(content=asset.brotli, media_type=asset.media_type, headers=headers)
+    if "gzip" in accepted:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=asset.gzipped, media_type=asset.media_type, headers=headers)
+    return Response(content=asset.body, media_type=asset.media_type, headers=headers)
+
+
+# Root endpoint (only without a bundled UI; otherwise the static mount serves it)
+if not HAS_STATIC_UI:
+    @app.get("/", response_class=HTMLResponse, include_in_schema=False)
+    async def root(request: Request):
+        """Serve the built-in web UI, pre-compressed when the client accepts br or gzip."""
+        # The preload hint lets the stylesheet fetch start before the body is parsed
+        return precompressed_response(
+            request,
+            DEFAULT_HTML,
+            headers={"Link": f"<{UI_CSS_HREF}>; rel=preload; as=style"},
+        )
+    
+    @app.get("/assets/ui.css", include_in_schema=False)
+    async def ui_css(request: Request):
+        """Serve the built-in page's stylesheet; the page links it by content hash."""
+        return precompressed_response(
+            request,
+            UI_CSS,
+            headers={"Cache-Control": "public, max-age=31536000, immutable"},
+        )
+
+
+# Health bodies for both connection states, serialized once. Response objects
+# are still built per request: middleware appends to their header list in place
+HEALTH_BODIES = {
+    state: orjson.dumps({"status": "healthy", "connected": state})
+    for state in (False, True)
+}
 
 
 @app.get("/api/health")
 async def health():
     """Health check endpoint."""
-    return {
-        "status": "healthy",
-        "connected": agent.is_connected() if agent else False,
-    }
+    return Response(content=HEALTH_BODIES[connected], media_type="application/json")
 
 
 @app.post("/api/connect")
 async def connect(request: ConnectRequest):
     """Connect to a database."""
-    global agent
+    global agent, connected
     
     try:
-        if agent is None:
-            agent = QueryAgent()
-        
-        result = agent.connect_database(
-            db_type=request.db_type,
-            db_name=request.db_name,
-            db_host=request.db_host,
-            db_port=request.db_port,
-            db_user=request.db_user,
-            db_password=request.db_password,
-        )
-        
-        # Get schema info
-        schema_json = agent.get_schema()
-        schema_data = json.loads(schema_json)
+        async with agent_lock:
+            if agent is None:
+                agent = await run_in_threadpool(QueryAgent, headless=True)
+            
+            # Agent calls block on the network; keep them off the event loop
+            result = await run_in_threadpool(
+                agent.connect,
+                db_type=request.db_type,
+                db_name=request.db_name,
+                db_host=request.db_host,
+                db_port=request.db_port,
+                db_user=request.db_user,
+                db_password=request.db_password,
+            )
+            
+            # A failed connect leaves the agent on its previous engine, so the
+            # connection state and cached responses stay as they were
+            if not result.success:
+                return OrjsonResponse({
+                    "success": False,
+                    "message": result.message,
+                    "tables": [],
+                    "table_count": 0,
+                })
+            connected = True
+            
+            # Get schema info; a new connection invalidates cached responses
+            schema_cache.clear()
+            query_cache.clear()
+            schema_data = await run_in_threadpool(agent.get_schema_data)
+            schema_cache.set(_schema_cache_key("schema"), schema_data)
         
-        return {
-            "success": result.startswith("✅"),
-            "message": result,
+        return OrjsonResponse({
+            "success": result.success,
+            "message": result.message,
             "tables": list(schema_data.get("tables", {}).keys()),
             "table_count": schema_data.get("total_tables", 0),
-        }
+        })
     except Exception as e:
         logger.error(f"Connection error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -106,59 +368,262 @@ async def connect(request: ConnectRequest):
 @app.get("/api/schema")
 async def get_schema():
     """Get database schema."""
-    if not agent or not agent.is_connected():
+    if not connected:
         raise HTTPException(status_code=400, detail="Not connected to database")
     
     try:
-        schema_json = agent.get_schema()
-        return json.loads(schema_json)
+        key = _schema_cache_key("schema")
+        schema_data = schema_cache.get(key)
+        if schema_data is None:
+            schema_data = await run_in_threadpool(agent.get_schema_data)
+            schema_cache.set(key, schema_data)
+        return OrjsonResponse(schema_data)
     except Exception as e:
         logger.error(f"Schema error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _query_cache_key(prompt: str, debug: bool, max_rows: int) -> tuple:
+    """Cache key for an answered prompt on the agent's current connection."""
+    return (
+        hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest(),
+        debug,
+        max_rows,
+        id(agent.connect_db_tool.get_engine()),
+    )
+
+
+def _is_cacheable_answer(response_data: Dict[str, Any]) -> bool:
+    """Check that an answer's query ran and its analysis did not fail."""
+    analysis = response_data.get("analysis")
+    return bool(response_data["result"].get("success")) and not (
+        isinstance(analysis, str) and analysis.startswith("❌")
+    )
+
+
+async def run_query(prompt: str, debug: bool = False) -> dict:
+    """
+    Answer a natural language query, reusing a cached answer when possible.
+    
+    Shared by /api/query and "query" messages on /ws/chat.
+    
+    Args:
+        prompt: User's natural language query
+        debug: Enable debug mode
+        
+    Returns:
+        Response payload with sql, result and analysis
+        
+    Raises:
+        HTTPException: 400 if the agent could not answer the prompt
+    """
+    # Exact-match cache; only successful answers are stored
+    key = _query_cache_key(prompt, debug, QUERY_MAX_ROWS)
+    response_data = query_cache.get(key)
+    if response_data is not None:
+        return response_data
+    
+    results = await run_in_threadpool(
+        agent.execute_query_flow,
+        user_prompt=prompt,
+        debug=debug,
+    )
+    
+    if results.get("error"):
+        raise HTTPException(status_code=400, detail=results["error"])
+    
+    response_data = {
+        "success": True,
+        "sql": results.get("sql_query"),
+        "result": orjson.loads(results.get("execution_result", "{}")),
+        "analysis": results.get("analysis"),
+    }
+    if _is_cacheable_answer(response_data):
+        query_cache.set(key, response_data)
+    return response_data
+
+
 @app.post("/api/query")
 async def execute_query(request: QueryRequest):
     """Execute a natural language query."""
-    if not agent or not agent.is_connected():
+    if not connected:
         raise HTTPException(status_code=400, detail="Not connected to database")
     
     try:
-        results = agent.execute_query_flow(
-            user_prompt=request.prompt,
-            debug=request.debug,
-        )
+        return OrjsonResponse(await run_query(request.prompt, request.debug))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Query error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def ndjson_line(value: Any) -> bytes:
+    """Serialize one NDJSON line."""
+    return orjson.dumps(value, default=str, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+
+
+def cached_ndjson(response_data: Dict[str, Any]) -> Iterator[bytes]:
+    """
+    Replay a cached /api/query answer in the /api/query/stream format.
+    
+    Args:
+        response_data: Payload stored in query_cache
+        
+    Returns:
+        Iterator of NDJSON byte chunks
+    """
+    result = response_data["result"]
+    columns = result.get("columns", [])
+    
+    yield ndjson_line({"type": "header", "sql": response_data["sql"], "columns": columns})
+    yield b"".join(ndjson_line([row.get(col) for col in columns]) for row in result.get("data", []))
+    yield ndjson_line({
+        "type": "end",
+        "row_count": result.get("row_count", 0),
+        "truncated": result.get("truncated", False),
+    })
+    yield ndjson_line({"type": "analysis", "analysis": response_data["analysis"]})
+
+
+async def finish_query_stream(
+    chunks: Iterator[bytes],
+    sql_query: str,
+    request: StreamQueryRequest,
+) -> AsyncIterator[bytes]:
+    """
+    Pass NDJSON chunks through, then record the answer like execute_query_flow.
+    
+    Up to max_rows rows (QUERY_MAX_ROWS when unbounded) are kept from the
+    stream itself. With request.analyze, they are analyzed after every row
+    has been sent, so the analysis never delays the table and the query does
+    not run twice, and an "analysis" line is added. The exchange goes into the
+    agent's chat history, and a bounded, analyzed answer into query_cache.
+    Nothing is recorded when the stream ended with an error line.
+    
+    Args:
+        chunks: Chunks from stream_ndjson
+        sql_query: Query being streamed
+        request: The stream request
+        
+    Returns:
+        Async iterator of NDJSON byte chunks
+    """
+    keep_rows = request.max_rows or QUERY_MAX_ROWS
+    columns: List[str] = []
+    rows: List[list] = []
+    last_chunk = b""
+    
+    # A sync iterator is advanced in the thread pool, one batch per step
+    async for chunk in iterate_in_threadpool(chunks):
+        yield chunk
+        last_chunk = chunk
+        
+        if not columns and chunk.startswith(b'{"type":"header"'):
+            columns = orjson.loads(chunk)["columns"]
+        elif chunk.startswith(b"[") and len(rows) < keep_rows:
+            rows.extend(orjson.loads(line) for line in chunk.splitlines()[:keep_rows - len(rows)])
+    
+    end = orjson.loads(last_chunk) if last_chunk.startswith(b'{"type":"end"') else None
+    if end is None:
+        return
+    
+    result = {
+        "success": True,
+        "row_count": len(rows),
+        "columns": columns,
+        "data": [dict(zip(columns, row)) for row in rows],
+        "truncated": end["truncated"] or len(rows) < end["row_count"],
+        "next_page_token": None,
+    }
+    
+    analysis = None
+    if request.analyze:
+        try:
+            analysis = await run_in_threadpool(
+                agent.analyze_data_tool._run,
+                query_result_json=orjson.dumps(result, default=str).decode(),
+                user_prompt=request.prompt,
+            )
+        except Exception as e:
+            logger.warning(f"Analysis failed: {str(e)}")
+            analysis = f"❌ Analysis failed: {str(e)}"
+        yield ndjson_line({"type": "analysis", "analysis": analysis})
         
-        if results.get("error"):
-            raise HTTPException(status_code=400, detail=results["error"])
+        # Only a bounded result is complete enough to answer a repeat prompt
+        response_data = {"success": True, "sql": sql_query, "result": result, "analysis": analysis}
+        if request.max_rows is not None and _is_cacheable_answer(response_data):
+            query_cache.set(
+                _query_cache_key(request.prompt, request.debug, request.max_rows),
+                response_data,
+            )
+    
+    agent.record_query_exchange(request.prompt, sql_query, analysis)
+
+
+@app.post("/api/query/stream")
+async def execute_query_stream(request: StreamQueryRequest):
+    """
+    Execute a natural language query and stream the result rows as NDJSON.
+    
+    Rows are JSON arrays; the "header" line carries the generated SQL and the
+    column names, the "end" line the row count (or an "error" line instead).
+    Rows are read in batches on a worker thread, so the response starts with
+    the first batch. max_rows bounds the result (default: every row). With
+    "analyze" set, an "analysis" line follows the row count, and a repeated
+    prompt with the same max_rows is replayed from query_cache.
+    """
+    if not connected:
+        raise HTTPException(status_code=400, detail="Not connected to database")
+    
+    if request.analyze and request.max_rows is not None:
+        response_data = query_cache.get(_query_cache_key(request.prompt, request.debug, request.max_rows))
+        if response_data is not None:
+            return StreamingResponse(
+                cached_ndjson(response_data),
+                media_type="application/x-ndjson",
+                headers=NDJSON_STREAM_HEADERS,
+            )
+    
+    try:
+        sql_query = await run_in_threadpool(agent.generate_sql, request.prompt, debug=request.debug)
+        if sql_query.startswith("❌"):
+            raise HTTPException(status_code=400, detail=sql_query)
         
-        return {
-            "success": True,
-            "sql": results.get("sql_query"),
-            "result": json.loads(results.get("execution_result", "{}")),
-            "analysis": results.get("analysis"),
-        }
+        chunks = agent.execute_query_tool.stream_ndjson(
+            sql_query,
+            metadata={"sql": sql_query},
+            max_rows=request.max_rows,
+        )
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Query error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return StreamingResponse(
+        finish_query_stream(chunks, sql_query, request),
+        media_type="application/x-ndjson",
+        headers=NDJSON_STREAM_HEADERS,
+    )
 
 
 @app.post("/api/sql")
 async def execute_sql(request: SQLRequest):
     """Execute raw SQL query."""
-    if not agent or not agent.is_connected():
+    if not connected:
         raise HTTPException(status_code=400, detail="Not connected to database")
     
     try:
-        execution_result = agent.execute_query_tool._run(sql_query=request.query)
-        result_data = json.loads(execution_result)
+        execution_result = await run_in_threadpool(agent.execute_query_tool._run, sql_query=request.query)
+        result_data = orjson.loads(execution_result)
         
-        return {
+        return OrjsonResponse({
             "success": result_data.get("success", False),
             "result": result_data,
-        }
+        })
     except Exception as e:
         logger.error(f"SQL error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -167,53 +632,127 @@ async def execute_sql(request: SQLRequest):
 @app.get("/api/tables")
 async def get_tables():
     """Get list of tables."""
-    if not agent or not agent.is_connected():
+    if not connected:
         raise HTTPException(status_code=400, detail="Not connected to database")
     
     try:
-        tables = agent.get_table_list()
-        return {"tables": tables}
+        key = _schema_cache_key("tables")
+        tables = schema_cache.get(key)
+        if tables is None:
+            tables = await run_in_threadpool(agent.get_table_list)
+            # An empty list only means the schema has not been extracted yet
+            if tables:
+                schema_cache.set(key, tables)
+        return OrjsonResponse({"tables": tables})
     except Exception as e:
         logger.error(f"Tables error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Chat messages one WebSocket client may have in flight at once
+WS_MAX_IN_FLIGHT = 4
+
+# Constant reply, serialized once
+NOT_CONNECTED_FRAME = orjson.dumps({
+    "type": "error",
+    "message": "Not connected to database",
+}).decode("utf-8")
+
+
+async def send_ws_json(websocket: WebSocket, payload: dict) -> None:
+    """Send a JSON text frame encoded with orjson (send_json uses the stdlib encoder)."""
+    await websocket.send_text(orjson.dumps(payload).decode("utf-8"))
+
+
+async def answer_chat_message(websocket: WebSocket, message_data: dict, slots: anyio.Semaphore) -> None:
+    """Answer one chat or query message and send the reply, then free its slot."""
+    reply_to = {"id": message_data["id"]} if "id" in message_data else {}
+    
+    try:
+        if message_data.get("type") == "query":
+            # Structured answer, same payload as POST /api/query
+            response_data = await run_query(
+                message_data.get("prompt") or message_data.get("message", ""),
+                bool(message_data.get("debug", False)),
+            )
+            await send_ws_json(websocket, {
+                **response_data,
+                "type": "query_result",
+                **reply_to,
+            })
+            return
+        
+        # Abandoned (not awaited) if the client disconnects mid-answer
+        response = await anyio.to_thread.run_sync(
+            partial(agent.chat, message_data.get("message", ""), debug=False),
+            abandon_on_cancel=True,
+        )
+        
+        await send_ws_json(websocket, {
+            "type": "response",
+            "message": response,
+            **reply_to,
+        })
+    except Exception as e:
+        await send_ws_json(websocket, {
+            "type": "error",
+            "message": e.detail if isinstance(e, HTTPException) else str(e),
+            **reply_to,
+        })
+    finally:
+        slots.release()
+
+
 @app.websocket("/ws/chat")
 async def websocket_chat(websocket: WebSocket):
-    """WebSocket endpoint for real-time chat."""
+    """
+    WebSocket endpoint for real-time chat.
+    
+    {"message": ...} is answered by the chat agent; {"type": "query", "prompt": ...}
+    runs the full query flow and replies with a "query_result" carrying the
+    same payload as POST /api/query, so the UI can reuse one connection.
+    Messages are answered concurrently, up to WS_MAX_IN_FLIGHT per client, so
+    a slow answer does not hold up receiving the next message; further ones
+    are rejected until a slot frees. Replies may arrive out of order and echo
+    the message "id" when the client sends one.
+    """
     await websocket.accept()
+    slots = anyio.Semaphore(WS_MAX_IN_FLIGHT)
     
-    try:
-        while True:
-            # Receive message
-            data = await websocket.receive_text()
-            message_data = json.loads(data)
-            
-            user_message = message_data.get("message", "")
-            
-            if not agent or not agent.is_connected():
-                await websocket.send_json({
-                    "type": "error",
-                    "message": "Not connected to database",
-                })
-                continue
-            
-            # Process query
-            try:
-                response = agent.chat(user_message, debug=False)
+    async with anyio.create_task_group() as tg:
+        try:
+            while True:
+                # Receive message
+                data = await websocket.receive_text()
+                message_data = orjson.loads(data)
                 
-                await websocket.send_json({
-                    "type": "response",
-                    "message": response,
-                })
-            except Exception as e:
-                await websocket.send_json({
-                    "type": "error",
-                    "message": str(e),
-                })
-    
-    except WebSocketDisconnect:
-        logger.info("WebSocket client disconnected")
+                if not connected:
+                    if "id" in message_data:
+                        await send_ws_json(websocket, {
+                            "type": "error",
+                            "message": "Not connected to database",
+                            "id": message_data["id"],
+                        })
+                    else:
+                        await websocket.send_text(NOT_CONNECTED_FRAME)
+                    continue
+                
+                try:
+                    slots.acquire_nowait()
+                except anyio.WouldBlock:
+                    await send_ws_json(websocket, {
+                        "type": "error",
+                        "message": "Too many messages in flight, try again shortly",
+                        **({"id": message_data["id"]} if "id" in message_data else {}),
+                    })
+                    continue
+                
+                tg.start_soon(answer_chat_message, websocket, message_data, slots)
+        
+        except WebSocketDisconnect:
+            logger.info("WebSocket client disconnected")
+            # Nobody is left to read pending answers
+            tg.cancel_scope.cancel()
 
 
 def get_default_html() -> str:
@@ -226,190 +765,8 @@ def get_default_html() -> str:
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>myquery - AI Database Assistant</title>
         
-        <!-- Tailwind CSS CDN -->
-        <script src="https://cdn.tailwindcss.com"></script>
-        
-        <!-- Custom Tailwind Config -->
-        <script>
-            tailwind.config = {
-                theme: {
-                    extend: {
-                        colors: {
-                            primary: '#667eea',
-                            'primary-dark': '#5568d3',
-                        }
-                    }
-                }
-            }
-        </script>
-        
-        <style>
-            * { margin: 0; padding: 0; box-sizing: border-box; }
-            body {
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                padding: 20px;
-            }
-            .container {
-                background: white;
-                border-radius: 12px;
-                box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-                padding: 40px;
-                max-width: 1200px;
-                width: 100%;
-            }
-            h1 { color: #667eea; margin-bottom: 10px; }
-            .subtitle { color: #666; margin-bottom: 30px; }
-            .section { margin: 20px 0; }
-            .btn {
-                background: #667eea;
-                color: white;
-                border: none;
-                padding: 12px 24px;
-                border-radius: 6px;
-                cursor: pointer;
-                font-size: 16px;
-                margin: 5px;
-            }
-            .btn:hover { background: #5568d3; }
-            input, textarea {
-                width: 100%;
-                padding: 12px;
-                border: 2px solid #e0e0e0;
-                border-radius: 6px;
-                margin: 10px 0;
-                font-size: 16px;
-            }
-            .status {
-                padding: 12px;
-                border-radius: 6px;
-                margin: 10px 0;
-            }
-            .success { background: #d4edda; color: #155724; }
-            .error { background: #f8d7da; color: #721c24; }
-            .info { background: #d1ecf1; color: #0c5460; }
-            #response {
-                background: #f8f9fa;
-                padding: 20px;
-                border-radius: 6px;
-                margin-top: 20px;
-                overflow-x: auto;
-            }
-            .results-table {
-                width: 100%;
-                border-collapse: collapse;
-                margin: 20px 0;
-                background: white;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                border-radius: 6px;
-                overflow: hidden;
-            }
-            .results-table th {
-                background: #667eea;
-                color: white;
-                padding: 12px;
-                text-align: left;
-                font-weight: 600;
-                border-bottom: 2px solid #5568d3;
-            }
-            .results-table td {
-                padding: 10px 12px;
-                border-bottom: 1px solid #e0e0e0;
-            }
-            .results-table tr:hover {
-                background: #f0f0f0;
-            }
-            .results-table tbody tr:nth-child(even) {
-                background: #f9f9f9;
-            }
-            .sql-code {
-                background: #2d2d2d;
-                color: #f8f8f2;
-                padding: 15px;
-                border-radius: 6px;
-                font-family: 'Courier New', monospace;
-                overflow-x: auto;
-                margin: 10px 0;
-            }
-            .analysis-box {
-                background: white;
-                border-left: 4px solid #667eea;
-                padding: 15px;
-                margin: 15px 0;
-                border-radius: 4px;
-                box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-            }
-            .tab-buttons {
-                display: flex;
-                gap: 10px;
-                margin: 15px 0;
-                flex-wrap: wrap;
-            }
-            .tab-btn {
-                padding: 10px 20px;
-                border: none;
-                background: #e0e0e0;
-                cursor: pointer;
-                border-radius: 6px;
-                transition: all 0.3s;
-                font-weight: 500;
-            }
-            .tab-btn:hover {
-                background: #d0d0d0;
-            }
-            .tab-btn.active {
-                background: #667eea;
-                color: white;
-            }
-            .tab-content {
-                display: none;
-            }
-            .tab-content.active {
-                display: block;
-                animation: fadeIn 0.3s;
-            }
-            @keyframes fadeIn {
-                from { opacity: 0; }
-                to { opacity: 1; }
-            }
-            .stats-box {
-                display: flex;
-                gap: 15px;
-                margin: 15px 0;
-                flex-wrap: wrap;
-            }
-            .stat-item {
-                background: white;
-                padding: 20px;
-                border-radius: 8px;
-                flex: 1;
-                min-width: 150px;
-                box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-                text-align: center;
-            }
-            .stat-label {
-                color: #666;
-                font-size: 14px;
-                margin-bottom: 8px;
-                text-transform: uppercase;
-                letter-spacing: 0.5px;
-            }
-            .stat-value {
-                font-size: 32px;
-                font-weight: bold;
-                color: #667eea;
-            }
-            .grid { display: grid; grid-template-columns: 1fr 1fr; gap: 20px; }
-            @media (max-width: 768px) { 
-                .grid { grid-template-columns: 1fr; }
-                .stats-box { flex-direction: column; }
-                .tab-buttons { flex-direction: column; }
-            }
-        </style>
+        <!-- Tailwind utilities and page styles, compiled ahead of time -->
+        <link rel="stylesheet" href="/assets/ui.css">
     </head>
     <body class="gradient-bg min-h-screen flex items-center justify-center p-4 md:p-8">
         <div class="w-full max-w-7xl bg-white rounded-2xl shadow-2xl p-6 md:p-10">
@@ -596,10 +953,17 @@ def get_default_html() -> str:
                 document.getElementById('query').value = '';
             }
             
+            // One regex pass with a lookup table instead of a throwaway element per call
+            const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
+            const HTML_ESCAPE_RE = /[&<>"']/g;
+            const HTML_SPECIAL_RE = /[&<>"']/;
+            
             function escapeHtml(text) {
-                const div = document.createElement('div');
-                div.textContent = text;
-                return div.innerHTML;
+                if (text === null || text === undefined) return '';
+                const str = String(text);
+                // Most values contain nothing to escape; return them without allocating
+                if (!HTML_SPECIAL_RE.test(str)) return str;
+                return str.replace(HTML_ESCAPE_RE, (ch) => HTML_ESCAPES[ch]);
             }
             
             // Connection function
@@ -623,6 +987,8 @@ def get_default_html() -> str:
                     const data = await response.json();
                     
                     if (data.success) {
+                        // Cached tables and answers belong to the previous database
+                        clientCacheClear();
                         status.innerHTML = `<div class="bg-green-100 border-l-4 border-green-500 text-green-700 p-4 rounded">✅ ${data.message}<br>Found ${data.table_count} table(s)</div>`;
                     } else {
                         status.innerHTML = `<div class="bg-red-100 border-l-4 border-red-500 text-red-700 p-4 rounded">❌ ${data.message}</div>`;
@@ -632,35 +998,283 @@ def get_default_html() -> str:
                 }
             }
             
+            // Two-level client cache: a Map for this page plus IndexedDB so
+            // answers survive a reload. Entries are {t: storedAt, v: value}
+            const CLIENT_CACHE_DB = 'myquery-cache';
+            const CLIENT_CACHE_STORE = 'responses';
+            const TABLES_CACHE_TTL_MS = 60000;
+            const QUERY_CACHE_TTL_MS = 30000;
+            // Same row limit as /api/query, so both share the server's answer cache
+            const QUERY_MAX_ROWS = 100;
+            // Larger results are not worth writing to IndexedDB
+            const QUERY_CACHE_MAX_ROWS = 5000;
+            const memoryCache = new Map();
+            let cacheDbPromise = null;
+            
+            function openCacheDb() {
+                if (cacheDbPromise === null) {
+                    cacheDbPromise = new Promise((resolve) => {
+                        if (!window.indexedDB) return resolve(null);
+                        const request = indexedDB.open(CLIENT_CACHE_DB, 1);
+                        request.onupgradeneeded = () => request.result.createObjectStore(CLIENT_CACHE_STORE);
+                        request.onsuccess = () => resolve(request.result);
+                        // Private browsing and the like: fall back to the Map alone
+                        request.onerror = () => resolve(null);
+                    });
+                }
+                return cacheDbPromise;
+            }
+            
+            async function cacheStoreRequest(mode, operation) {
+                const db = await openCacheDb();
+                if (!db) return undefined;
+                
+                return new Promise((resolve) => {
+                    const tx = db.transaction(CLIENT_CACHE_STORE, mode);
+                    const request = operation(tx.objectStore(CLIENT_CACHE_STORE));
+                    tx.oncomplete = () => resolve(request.result);
+                    tx.onerror = tx.onabort = () => resolve(undefined);
+                });
+            }
+            
+            async function clientCacheGet(key, ttlMs) {
+                let entry = memoryCache.get(key);
+                if (!entry) {
+                    entry = await cacheStoreRequest('readonly', store => store.get(key));
+                    if (entry) memoryCache.set(key, entry);
+                }
+                return entry && Date.now() - entry.t < ttlMs ? entry.v : undefined;
+            }
+            
+            function clientCacheSet(key, value) {
+                const entry = { t: Date.now(), v: value };
+                memoryCache.set(key, entry);
+                cacheStoreRequest('readwrite', store => store.put(entry, key));
+            }
+            
+            function clientCacheClear() {
+                memoryCache.clear();
+                cacheStoreRequest('readwrite', store => store.clear());
+            }
+            
             async function executeQuery() {
                 const query = document.getElementById('query').value;
                 const response_div = document.getElementById('response');
-                response_div.innerHTML = '<div class="bg-blue-100 border-l-4 border-blue-500 text-blue-700 p-4 rounded">⏳ Processing query...</div>';
+                const cacheKey = 'query:' + query;
+                
+                const cached = await clientCacheGet(cacheKey, QUERY_CACHE_TTL_MS);
+                if (cached) {
+                    renderCachedResult(cached, response_div);
+                    return;
+                }
+                
+                if (hasResultPage()) {
+                    // Keep the current result on screen; the new one is patched into it
+                    resultDom.statStatus.textContent = '⏳';
+                } else {
+                    response_div.innerHTML = '<div class="bg-blue-100 border-l-4 border-blue-500 text-blue-700 p-4 rounded">⏳ Processing query...</div>';
+                }
                 
                 try {
-                    const response = await fetch('/api/query', {
+                    const response = await fetch('/api/query/stream', {
                         method: 'POST',
                         headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ prompt: query, debug: true })
+                        body: JSON.stringify({ prompt: query, debug: true, analyze: true, max_rows: QUERY_MAX_ROWS })
                     });
                     
-                    const data = await response.json();
+                    if (!response.ok) {
+                        const error = await response.json();
+                        throw new Error(error.detail || response.statusText);
+                    }
                     
-                    if (data.success) {
-                        response_div.innerHTML = formatQueryResponse(data);
-                    } else {
-                        response_div.innerHTML = `<div class="bg-red-100 border-l-4 border-red-500 text-red-700 p-4 rounded">❌ Error: ${data.detail}</div>`;
+                    const result = await renderQueryStream(response, response_div);
+                    // Failed queries and failed analyses are shown, never replayed
+                    const analyzed = typeof result.analysis === 'string' && !result.analysis.startsWith('❌');
+                    if (!result.error && analyzed && result.data.length <= QUERY_CACHE_MAX_ROWS) {
+                        clientCacheSet(cacheKey, result);
                     }
                 } catch (error) {
                     response_div.innerHTML = `<div class="bg-red-100 border-l-4 border-red-500 text-red-700 p-4 rounded">❌ Error: ${error.message}</div>`;
                 }
             }
             
-            function formatQueryResponse(data) {
-                const result = data.result;
-                const rowCount = result.row_count || 0;
-                const columns = result.columns || [];
-                const rows = result.data || [];
+            // Render an NDJSON query stream as it arrives: the header line builds
+            // the page, each network chunk appends its rows in one batch
+            async function renderQueryStream(response, response_div) {
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                const result = { sql: null, columns: [], row_count: 0, truncated: false, data: [], analysis: null, error: null };
+                let started = false;
+                let buffered = '';
+                
+                while (true) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+                    
+                    buffered += decoder.decode(value, { stream: true });
+                    const lines = buffered.split('\\n');
+                    buffered = lines.pop();
+                    
+                    const batch = [];
+                    for (const line of lines) {
+                        if (!line) continue;
+                        const message = JSON.parse(line);
+                        
+                        // Rows are arrays in column order; every other line is a tagged object
+                        if (Array.isArray(message)) {
+                            const row = {};
+                            for (let c = 0; c < result.columns.length; c++) row[result.columns[c]] = message[c];
+                            batch.push(row);
+                        } else if (message.type === 'header') {
+                            started = true;
+                            result.sql = message.sql;
+                            result.columns = message.columns;
+                            renderResultPage(result, response_div);
+                        } else if (message.type === 'end') {
+                            result.row_count = message.row_count;
+                            result.truncated = message.truncated;
+                            finishResultTable(result.row_count, result.truncated);
+                        } else if (message.type === 'error') {
+                            // The query can fail before its header line
+                            if (!started) throw new Error(message.error);
+                            result.error = message.error;
+                            showResultError(message.error);
+                        } else if (message.type === 'analysis') {
+                            result.analysis = message.analysis;
+                            showAnalysis(message.analysis);
+                        }
+                    }
+                    
+                    if (batch.length > 0) {
+                        placeResultRows(batch, result.data.length);
+                        for (const row of batch) result.data.push(row);
+                        resultDom.statRows.textContent = result.data.length;
+                    }
+                }
+                
+                showResultJson(result);
+                return result;
+            }
+            
+            // Same page as a finished stream, built from a cached result
+            function renderCachedResult(result, response_div) {
+                renderResultPage(result, response_div);
+                placeResultRows(result.data, 0);
+                finishResultTable(result.row_count, result.truncated);
+                showAnalysis(result.analysis);
+                showResultJson(result);
+            }
+            
+            // The Raw JSON tab is serialized on first view, not for every result
+            let jsonResult = null;
+            
+            function showResultJson(result) {
+                jsonResult = result;
+                if (activeTab === 'json') fillJsonView();
+            }
+            
+            function fillJsonView() {
+                const pre = resultDom.jsonView;
+                if (jsonResult === null || pre.dataset.filled) return;
+                pre.textContent = JSON.stringify(jsonResult, null, 2);
+                pre.dataset.filled = '1';
+            }
+            
+            function showAnalysis(analysis) {
+                // The container keeps line breaks (pre-wrap), so plain text is enough
+                resultDom.analysisText.textContent = analysis;
+            }
+            
+            function finishResultTable(rowCount, truncated) {
+                resultDom.statRows.textContent = rowCount;
+                resultDom.statStatus.textContent = '✅';
+                if (rowCount === 0) {
+                    resultDom.resultTable.hidden = true;
+                    showResultNote('bg-blue-100 border-l-4 border-blue-500 text-blue-700 p-4 rounded', 'ℹ️ Query executed successfully but returned no results.');
+                } else if (truncated) {
+                    showResultNote('mt-4 bg-yellow-100 border-l-4 border-yellow-500 text-yellow-700 p-4 rounded', '⚠️ Results truncated. Use LIMIT in your query for more control.');
+                }
+            }
+            
+            function showResultError(message) {
+                resultDom.statStatus.textContent = '❌';
+                resultDom.analysisText.textContent = 'No analysis: the query failed.';
+                showResultNote('mt-4 bg-red-100 border-l-4 border-red-500 text-red-700 p-4 rounded', '❌ Error: ' + message);
+            }
+            
+            function showResultNote(className, text) {
+                const note = resultDom.resultNote;
+                note.className = className;
+                note.textContent = text;
+                note.hidden = false;
+            }
+            
+            // Build the result page from its markup, then fill free text through
+            // textContent so it is never escaped in JS or parsed as HTML. A page
+            // already showing the same columns is patched instead of rebuilt
+            function renderResultPage(result, response_div) {
+                if (hasResultPage() && sameColumns(resultView.columns, result.columns)) {
+                    resetResultPage();
+                } else {
+                    response_div.innerHTML = formatQueryResponse(result);
+                    cacheResultDom();
+                    startResultView(result.columns);
+                }
+                
+                if (resultDom.sqlView.textContent !== result.sql) {
+                    resultDom.sqlView.textContent = result.sql;
+                }
+            }
+            
+            function hasResultPage() {
+                return resultDom !== null && resultDom.resultTable.isConnected;
+            }
+            
+            function sameColumns(a, b) {
+                return a.length === b.length && a.every((col, i) => col === b[i]);
+            }
+            
+            // Put the page on screen back into its loading state. The active tab
+            // and the table's row nodes stay, so only cells whose value changed
+            // are rewritten; the previous rows are dropped up front so none of
+            // them show alongside the new result while it streams in
+            function resetResultPage() {
+                trimResultRows(0);
+                jsonResult = null;
+                delete resultDom.jsonView.dataset.filled;
+                resultDom.jsonView.textContent = '⏳ Waiting for all rows...';
+                resultDom.statStatus.textContent = '⏳';
+                resultDom.resultTable.hidden = false;
+                resultDom.resultNote.hidden = true;
+                resultDom.analysisText.textContent = '⏳ Analyzing results...';
+            }
+            
+            // Elements of the current result page, looked up once per render;
+            // streaming and tab switches then write to them directly
+            let resultDom = null;
+            
+            function cacheResultDom() {
+                const byId = (id) => document.getElementById(id);
+                resultDom = {
+                    statRows: byId('stat-rows'),
+                    statStatus: byId('stat-status'),
+                    resultTable: byId('result-table'),
+                    resultNote: byId('result-note'),
+                    sqlView: byId('sql-view'),
+                    analysisText: byId('analysis-text'),
+                    jsonView: byId('json-view'),
+                    tabs: {},
+                };
+                for (const name of TAB_NAMES) {
+                    resultDom.tabs[name] = { panel: byId('tab-' + name), button: byId('tab-btn-' + name) };
+                }
+            }
+            
+            function formatQueryResponse(result) {
+                const columns = result.columns;
+                // The page being built opens on the table tab, with no JSON yet
+                activeTab = 'table';
+                jsonResult = null;
                 
                 let html = '';
                 
@@ -668,7 +1282,7 @@ def get_default_html() -> str:
                 html += '<div class="grid grid-cols-1 md:grid-cols-3 gap-4 mb-6">';
                 html += '<div class="bg-white p-6 rounded-xl shadow-md text-center border-t-4 border-primary">';
                 html += '<div class="text-gray-600 text-sm font-semibold uppercase tracking-wide mb-2">Rows Returned</div>';
-                html += '<div class="text-4xl font-bold text-primary">' + rowCount + '</div>';
+                html += '<div id="stat-rows" class="text-4xl font-bold text-primary">0</div>';
                 html += '</div>';
                 html += '<div class="bg-white p-6 rounded-xl shadow-md text-center border-t-4 border-blue-500">';
                 html += '<div class="text-gray-600 text-sm font-semibold uppercase tracking-wide mb-2">Columns</div>';
@@ -676,89 +1290,183 @@ def get_default_html() -> str:
                 html += '</div>';
                 html += '<div class="bg-white p-6 rounded-xl shadow-md text-center border-t-4 border-green-500">';
                 html += '<div class="text-gray-600 text-sm font-semibold uppercase tracking-wide mb-2">Status</div>';
-                html += '<div class="text-4xl">✅</div>';
+                html += '<div id="stat-status" class="text-4xl">⏳</div>';
                 html += '</div>';
                 html += '</div>';
                 
                 // Tabs
                 html += '<div class="flex flex-wrap gap-2 mb-4">';
-                html += '<button class="tab-btn active bg-primary text-white px-6 py-3 rounded-lg font-semibold transition shadow-md hover:bg-primary-dark" onclick="showTab(' + "'table'" + ')">📊 Table View</button>';
-                html += '<button class="tab-btn bg-gray-200 text-gray-700 px-6 py-3 rounded-lg font-semibold transition shadow-md hover:bg-gray-300" onclick="showTab(' + "'sql'" + ')">💻 SQL Query</button>';
-                html += '<button class="tab-btn bg-gray-200 text-gray-700 px-6 py-3 rounded-lg font-semibold transition shadow-md hover:bg-gray-300" onclick="showTab(' + "'analysis'" + ')">💡 AI Analysis</button>';
-                html += '<button class="tab-btn bg-gray-200 text-gray-700 px-6 py-3 rounded-lg font-semibold transition shadow-md hover:bg-gray-300" onclick="showTab(' + "'json'" + ')">📋 Raw JSON</button>';
+                html += '<button id="tab-btn-table" class="tab-btn active bg-primary text-white px-6 py-3 rounded-lg font-semibold transition shadow-md hover:bg-primary-dark" onclick="showTab(' + "'table'" + ')">📊 Table View</button>';
+                html += '<button id="tab-btn-sql" class="tab-btn bg-gray-200 text-gray-700 px-6 py-3 rounded-lg font-semibold transition shadow-md hover:bg-gray-300" onclick="showTab(' + "'sql'" + ')">💻 SQL Query</button>';
+                html += '<button id="tab-btn-analysis" class="tab-btn bg-gray-200 text-gray-700 px-6 py-3 rounded-lg font-semibold transition shadow-md hover:bg-gray-300" onclick="showTab(' + "'analysis'" + ')">💡 AI Analysis</button>';
+                html += '<button id="tab-btn-json" class="tab-btn bg-gray-200 text-gray-700 px-6 py-3 rounded-lg font-semibold transition shadow-md hover:bg-gray-300" onclick="showTab(' + "'json'" + ')">📋 Raw JSON</button>';
                 html += '</div>';
                 
-                // Table View
-                html += '<div id="tab-table" class="tab-content active">';
-                if (rows.length > 0) {
-                    html += '<div class="overflow-x-auto rounded-lg shadow-lg">';
-                    html += '<table class="min-w-full bg-white">';
-                    html += '<thead class="bg-primary text-white"><tr>';
-                    columns.forEach(col => {
-                        html += '<th class="px-6 py-3 text-left text-sm font-semibold">' + escapeHtml(col) + '</th>';
-                    });
-                    html += '</tr></thead><tbody class="divide-y divide-gray-200">';
-                    
-                    rows.forEach((row, idx) => {
-                        html += '<tr class="hover:bg-gray-50 transition">';
-                        columns.forEach(col => {
-                            const value = row[col];
-                            html += '<td class="px-6 py-4 text-sm text-gray-900">' + escapeHtml(String(value !== null && value !== undefined ? value : '')) + '</td>';
-                        });
-                        html += '</tr>';
-                    });
-                    
-                    html += '</tbody></table></div>';
-                    
-                    if (result.truncated) {
-                        html += '<div class="mt-4 bg-yellow-100 border-l-4 border-yellow-500 text-yellow-700 p-4 rounded">⚠️ Results truncated. Use LIMIT in your query for more control.</div>';
-                    }
-                } else {
-                    html += '<div class="bg-blue-100 border-l-4 border-blue-500 text-blue-700 p-4 rounded">ℹ️ Query executed successfully but returned no results.</div>';
-                }
+                // Table View; the rows in view are rendered by renderResultWindow
+                html += '<div id="tab-table" class="tab-content">';
+                html += '<div id="result-table" class="result-viewport overflow-x-auto rounded-lg shadow-lg">';
+                html += '<table class="min-w-full bg-white">';
+                html += '<thead class="bg-primary text-white"><tr>';
+                columns.forEach(col => {
+                    html += '<th class="px-6 py-3 text-left text-sm font-semibold">' + escapeHtml(col) + '</th>';
+                });
+                html += '</tr></thead><tbody class="hover-rows divide-y divide-gray-200"></tbody></table></div>';
+                html += '<div id="result-note" hidden></div>';
                 html += '</div>';
                 
                 // SQL View
-                html += '<div id="tab-sql" class="tab-content">';
+                html += '<div id="tab-sql" class="tab-content" hidden>';
                 html += '<div class="bg-gray-900 text-gray-100 p-6 rounded-lg overflow-x-auto shadow-lg">';
-                html += '<pre class="font-mono text-sm">' + escapeHtml(data.sql) + '</pre>';
+                html += '<pre id="sql-view" class="font-mono text-sm"></pre>';
                 html += '</div>';
                 html += '</div>';
                 
-                // Analysis View
-                html += '<div id="tab-analysis" class="tab-content">';
+                // Analysis View; filled in when the analysis line arrives
+                html += '<div id="tab-analysis" class="tab-content" hidden>';
                 html += '<div class="bg-white border-l-4 border-primary p-6 rounded-lg shadow-lg">';
                 html += '<h3 class="text-2xl font-bold text-primary mb-4 flex items-center gap-2"><span>🤖</span> AI Analysis</h3>';
-                html += '<div class="text-gray-700 leading-relaxed">' + escapeHtml(data.analysis).replace(/\\n/g, '<br>') + '</div>';
+                html += '<div id="analysis-text" class="text-gray-700 leading-relaxed whitespace-pre-wrap">⏳ Analyzing results...</div>';
                 html += '</div>';
                 html += '</div>';
                 
-                // JSON View
-                html += '<div id="tab-json" class="tab-content">';
+                // JSON View; filled in on first view once the stream ends
+                html += '<div id="tab-json" class="tab-content" hidden>';
                 html += '<div class="bg-gray-50 p-6 rounded-lg overflow-x-auto shadow-lg">';
-                html += '<pre class="font-mono text-sm text-gray-800">' + escapeHtml(JSON.stringify(data, null, 2)) + '</pre>';
+                html += '<pre id="json-view" class="font-mono text-sm text-gray-800">⏳ Waiting for all rows...</pre>';
                 html += '</div>';
                 html += '</div>';
                 
                 return html;
             }
             
-            // Tab switching function
-            function showTab(tabName) {
-                // Hide all tabs
-                document.querySelectorAll('.tab-content').forEach(tab => {
-                    tab.classList.remove('active');
-                });
-                document.querySelectorAll('.tab-btn').forEach(btn => {
-                    btn.classList.remove('active');
-                    btn.classList.remove('bg-primary', 'text-white', 'hover:bg-primary-dark');
-                    btn.classList.add('bg-gray-200', 'text-gray-700', 'hover:bg-gray-300');
+            // Result table virtualization: all rows stay in resultView.rows and
+            // only the slice in the viewport is bound to a small pool of <tr>
+            // nodes, reused as the table scrolls. Spacer rows keep the scrollbar
+            // sized for the full result
+            const RESULT_OVERSCAN = 10;
+            const resultView = { rows: [], columns: [], pool: [], rowHeight: 53, scheduled: false };
+            
+            function startResultView(columns) {
+                const viewport = resultDom.resultTable;
+                const tbody = viewport.querySelector('tbody');
+                
+                resultView.rows = [];
+                resultView.columns = columns;
+                resultView.pool = [];
+                resultView.viewport = viewport;
+                resultView.tbody = tbody;
+                resultView.topSpacer = createSpacerRow(columns.length);
+                resultView.bottomSpacer = createSpacerRow(columns.length);
+                tbody.append(resultView.topSpacer, resultView.bottomSpacer);
+                
+                viewport.addEventListener('scroll', scheduleResultRender, { passive: true });
+            }
+            
+            // Rows land by index as they stream in
+            function placeResultRows(rows, start) {
+                for (let i = 0; i < rows.length; i++) resultView.rows[start + i] = rows[i];
+                scheduleResultRender();
+            }
+            
+            function trimResultRows(length) {
+                resultView.rows.length = length;
+                scheduleResultRender();
+            }
+            
+            function createSpacerRow(colspan) {
+                const tr = document.createElement('tr');
+                const td = document.createElement('td');
+                td.colSpan = Math.max(colspan, 1);
+                td.style.padding = '0';
+                tr.appendChild(td);
+                return tr;
+            }
+            
+            // Coalesce scroll events and streamed batches into one render per frame
+            function scheduleResultRender() {
+                if (resultView.scheduled) return;
+                resultView.scheduled = true;
+                requestAnimationFrame(() => {
+                    resultView.scheduled = false;
+                    renderResultWindow();
                 });
+            }
+            
+            function renderResultWindow() {
+                const { rows, columns, pool, viewport } = resultView;
+                if (!viewport || !viewport.isConnected) return;
                 
-                // Show selected tab
-                document.getElementById('tab-' + tabName).classList.add('active');
-                event.target.classList.add('active', 'bg-primary', 'text-white', 'hover:bg-primary-dark');
-                event.target.classList.remove('bg-gray-200', 'text-gray-700', 'hover:bg-gray-300');
+                const rowHeight = resultView.rowHeight;
+                const visible = Math.ceil((viewport.clientHeight || 600) / rowHeight);
+                // Clamped: the scroll offset can still point past a result that just shrank
+                const first = Math.max(0, Math.min(rows.length - visible, Math.floor(viewport.scrollTop / rowHeight) - RESULT_OVERSCAN));
+                const last = Math.min(rows.length, first + visible + 2 * RESULT_OVERSCAN);
+                const count = last - first;
+                
+                // Grow the pool in one fragment; nodes are only ever reused afterwards
+                if (pool.length < count) {
+                    const frag = document.createDocumentFragment();
+                    while (pool.length < count) {
+                        const tr = document.createElement('tr');
+                        for (let i = 0; i < columns.length; i++) {
+                            const td = document.createElement('td');
+                            td.className = 'px-6 py-4 text-sm text-gray-900';
+                            tr.appendChild(td);
+                        }
+                        pool.push(tr);
+                        frag.appendChild(tr);
+                    }
+                    resultView.tbody.insertBefore(frag, resultView.bottomSpacer);
+                }
+                
+                for (let i = 0; i < pool.length; i++) {
+                    const tr = pool[i];
+                    const row = rows[first + i];
+                    tr.hidden = i >= count;
+                    if (tr.hidden) continue;
+                    
+                    // Skip unchanged cells; reads are cheap, DOM writes are not
+                    const cells = tr.children;
+                    for (let c = 0; c < columns.length; c++) {
+                        const text = String(row[columns[c]] ?? '');
+                        if (cells[c].textContent !== text) cells[c].textContent = text;
+                    }
+                }
+                
+                resultView.topSpacer.firstChild.style.height = (first * rowHeight) + 'px';
+                resultView.bottomSpacer.firstChild.style.height = ((rows.length - last) * rowHeight) + 'px';
+                
+                // Cells don't wrap, so one rendered row gives the height for all
+                if (count > 0 && pool[0].offsetHeight > 0 && pool[0].offsetHeight !== rowHeight) {
+                    resultView.rowHeight = pool[0].offsetHeight;
+                    scheduleResultRender();
+                }
+            }
+            
+            // Tab switching: only the outgoing and incoming tab are touched, and
+            // panels are shown and hidden with the hidden attribute
+            const TAB_NAMES = ['table', 'sql', 'analysis', 'json'];
+            const TAB_ACTIVE_CLASSES = ['active', 'bg-primary', 'text-white', 'hover:bg-primary-dark'];
+            const TAB_INACTIVE_CLASSES = ['bg-gray-200', 'text-gray-700', 'hover:bg-gray-300'];
+            let activeTab = 'table';
+            
+            function showTab(tabName) {
+                if (tabName === activeTab) return;
+                
+                setTabActive(activeTab, false);
+                setTabActive(tabName, true);
+                activeTab = tabName;
+                
+                // Rows may have streamed in while the table was hidden and unmeasured
+                if (tabName === 'table') scheduleResultRender();
+                if (tabName === 'json') fillJsonView();
+            }
+            
+            function setTabActive(tabName, active) {
+                const { panel, button: btn } = resultDom.tabs[tabName];
+                panel.hidden = !active;
+                btn.classList.remove(...(active ? TAB_INACTIVE_CLASSES : TAB_ACTIVE_CLASSES));
+                btn.classList.add(...(active ? TAB_ACTIVE_CLASSES : TAB_INACTIVE_CLASSES));
             }
             
             // Get tables function
@@ -766,8 +1474,12 @@ def get_default_html() -> str:
                 const response_div = document.getElementById('response');
                 
                 try {
-                    const response = await fetch('/api/tables');
-                    const data = await response.json();
+                    let data = await clientCacheGet('tables', TABLES_CACHE_TTL_MS);
+                    if (!data) {
+                        const response = await fetch('/api/tables');
+                        data = await response.json();
+                        if (response.ok) clientCacheSet('tables', data);
+                    }
                     
                     let html = '<h3 class="text-2xl font-bold text-primary mb-4 flex items-center gap-2"><span>📋</span> Available Tables</h3>';
                     html += '<div class="overflow-x-auto rounded-lg shadow-lg">';
@@ -775,14 +1487,18 @@ def get_default_html() -> str:
                     html += '<thead class="bg-primary text-white"><tr>';
                     html += '<th class="px-6 py-3 text-left text-sm font-semibold">#</th>';
                     html += '<th class="px-6 py-3 text-left text-sm font-semibold">Table Name</th>';
-                    html += '</tr></thead><tbody class="divide-y divide-gray-200">';
+                    html += '</tr></thead><tbody class="hover-rows divide-y divide-gray-200">';
                     
+                    const parts = [];
                     data.tables.forEach((table, index) => {
-                        html += '<tr class="hover:bg-gray-50 transition">';
-                        html += '<td class="px-6 py-4 text-sm text-gray-500">' + (index + 1) + '</td>';
-                        html += '<td class="px-6 py-4 text-sm font-semibold text-gray-900">' + escapeHtml(table) + '</td>';
-                        html += '</tr>';
+                        parts.push(
+                            '<tr>',
+                            '<td class="px-6 py-4 text-sm text-gray-500">', index + 1, '</td>',
+                            '<td class="px-6 py-4 text-sm font-semibold text-gray-900">', escapeHtml(table), '</td>',
+                            '</tr>'
+                        );
                     });
+                    html += parts.join('');
                     
                     html += '</tbody></table></div>';
                     html += '<div class="mt-4 bg-green-100 border-l-4 border-green-500 text-green-700 p-4 rounded">✅ Found ' + data.tables.length + ' table(s)</div>';
@@ -798,10 +1514,85 @@ def get_default_html() -> str:
     """
 
 
-def start_web_server(host: str = "0.0.0.0", port: int = 8000):
-    """Start the web server."""
-    import uvicorn
-    uvicorn.run(app, host=host, port=port)
+# The built-in page never changes; encode, compress and hash it once instead
+# of on every hit. GZipMiddleware leaves responses that already set
+# Content-Encoding alone
+UI_CSS = build_static_asset(UI_CSS_PATH.read_bytes(), "text/css")
+# The page links the stylesheet by content hash, so browsers may keep it
+# forever and still pick up a new release
+UI_CSS_HREF = f"/assets/ui.css?v={UI_CSS.etag[3:15]}"
+DEFAULT_HTML = build_static_asset(
+    get_default_html().replace('href="/assets/ui.css"', f'href="{UI_CSS_HREF}"').encode("utf-8"),
+    "text/html",
+)
+
+
+# Mounted after every route so /api and /ws paths match first; StaticFiles
+# answers with sendfile and conditional (ETag/Last-Modified) responses
+if HAS_STATIC_UI:
+    app.mount("/", StaticFiles(directory=STATIC_DIR, html=True), name="static")
+
+
+def start_web_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    certfile: Optional[str] = None,
+    keyfile: Optional[str] = None,
+):
+    """
+    Start the web server.
+    
+    Listens on loopback only by default; pass host="0.0.0.0" to accept
+    connections from other machines (e.g. inside a container).
+    
+    Runs a single worker: the connected agent, its caches and the WebSocket
+    sessions live in this process, so extra workers would each need their own
+    connect. Concurrency comes from the thread pool instead.
+    
+    Args:
+        host: Interface to bind
+        port: Port to bind
+        certfile: TLS certificate; with keyfile, serves HTTP/2 through Hypercorn
+        keyfile: TLS private key
+        
+    Raises:
+        RuntimeError: If TLS is requested but Hypercorn is not installed
+    """
+    if certfile and keyfile:
+        _serve_http2(host, port, certfile, keyfile)
+        return
+    
+    # "auto" picks uvloop and httptools (C event loop and HTTP parser, installed
+    # with uvicorn[standard]) and falls back to asyncio/h11 without them. The
+    # per-request access log line is skipped; errors are still logged
+    config = uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        loop="auto",
+        http="auto",
+        access_log=False,
+        workers=1,
+    )
+    uvicorn.Server(config).run()
+
+
+def _serve_http2(host: str, port: int, certfile: str, keyfile: str) -> None:
+    """Serve over TLS with Hypercorn, negotiating HTTP/2 (or HTTP/1.1) via ALPN."""
+    try:
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+    except ImportError:
+        raise RuntimeError('HTTP/2 needs Hypercorn: pip install "myquery[web]"')
+    
+    # Browsers only speak HTTP/2 over TLS, so there is no plaintext h2c mode
+    config = Config()
+    config.bind = [f"[{host}]:{port}" if ":" in host else f"{host}:{port}"]
+    config.certfile = certfile
+    config.keyfile = keyfile
+    config.alpn_protocols = ["h2", "http/1.1"]
+    config.accesslog = None
+    asyncio.run(serve(app, config))
 
 
 if __name__ == "__main__":